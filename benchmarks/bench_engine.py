@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark: integer-seconds schedule engine vs. the legacy datetime loop.
+
+Builds a synthetic 10,000-train day (5,000 per direction) and times
+build_schedule() against a reference copy of the pre-integer implementation,
+which re-parsed every departure with strptime and called get_wait_time()
+once per train per station. When NumPy is installed the vectorized matrix
+builder is timed as well. All variants must produce identical timetables.
+
+Run from the repository root:
+    python3 benchmarks/bench_engine.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import generate_timetable as gt  # noqa: E402
+
+
+def synthetic_slots(trains: int, start_sec: int = 3 * 3600, headway: int = 15) -> list:
+    """Slots producing exactly `trains` departures, cycling through every period type.
+
+    A 15 s headway keeps 5,000 trains per direction inside one service day.
+    """
+    slots = []
+    t = start_sec
+    k = 0
+    while trains > 0:
+        n = min(500, trains)
+        end = t + n * headway
+        slots.append((gt.format_seconds(t), gt.format_seconds(end), headway, gt.PERIOD_TYPES[k % len(gt.PERIOD_TYPES)]))
+        t = end
+        trains -= n
+        k += 1
+    return slots
+
+
+# ── Legacy reference ──
+# Private copies of the pre-integer helpers, so the reference keeps timing the
+# original implementation however the generator's own helpers evolve.
+
+def _legacy_parse_time(time_str: str) -> datetime:
+    """The original strptime-based parse_time."""
+    time_str = time_str.strip()
+    if ':' not in time_str:
+        if 'AM' in time_str.upper() or 'PM' in time_str.upper():
+            time_part, am_pm = time_str.split()[0], time_str.split()[1]
+            if len(time_part) == 3:
+                time_str = f"{time_part[0]}:{time_part[1:]} {am_pm}"
+            elif len(time_part) == 4:
+                time_str = f"{time_part[:2]}:{time_part[2:]} {am_pm}"
+        elif len(time_str) == 3:
+            time_str = f"{time_str[0]}:{time_str[1:]}"
+        elif len(time_str) == 4:
+            time_str = f"{time_str[:2]}:{time_str[2:]}"
+    try:
+        return datetime.strptime(time_str, "%H:%M:%S")
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(time_str, "%H:%M")
+    except ValueError:
+        return datetime.strptime(time_str, "%I:%M %p")
+
+
+def _legacy_format_time(dt: datetime) -> str:
+    return dt.strftime("%H:%M:%S")
+
+
+def _legacy_time_gap(dt_a: datetime, dt_b: datetime) -> float:
+    gap = (dt_b - dt_a).total_seconds()
+    if gap < 0:
+        gap += 86400
+    return gap
+
+
+def _legacy_get_wait_time(station: str, period_type: str, direction: str = None) -> int:
+    """The original four-key DWELL_OVERRIDES probe, run once per train per station."""
+    def _resolve(val):
+        return gt.WAIT_CATEGORIES[val] if isinstance(val, str) else int(val)
+
+    d = direction or "*"
+    for key in [
+        (period_type, d, station),
+        (period_type, d, "*"),
+        (period_type, "*", station),
+        ("*", "*", station),
+    ]:
+        if key in gt.DWELL_OVERRIDES:
+            return _resolve(gt.DWELL_OVERRIDES[key])
+    return gt.WAIT_CATEGORIES[gt.DEFAULT_WAIT]
+
+
+def _legacy_station_offsets(journey_times, period_type: str, direction: str = None) -> dict:
+    """The original compute_station_offsets, probing dwell rules per station."""
+    offsets, cumulative = {}, 0
+    for i, (station, dur_str) in enumerate(journey_times):
+        cumulative += gt.parse_duration(dur_str)
+        offsets[station] = cumulative
+        if 0 < i < len(journey_times) - 1 and station not in gt.NO_DWELL_STATIONS:
+            cumulative += _legacy_get_wait_time(station, period_type, direction)
+    return offsets
+
+
+def legacy_build(slots_motijheel, slots_uttara):
+    """Reference copy of the datetime-based fill loop (pre integer engine)."""
+    def departures(slots):
+        all_trains, last_dt, prev_headway = [], None, None
+        for start_time, end_time, headway, period_type in slots:
+            start_dt, end_dt = _legacy_parse_time(start_time), _legacy_parse_time(end_time)
+            if start_dt == end_dt:
+                trains = [_legacy_format_time(start_dt)]
+            else:
+                if end_dt <= start_dt:
+                    end_dt += timedelta(days=1)
+                trains, cur = [], start_dt
+                while cur < end_dt:
+                    trains.append(_legacy_format_time(cur))
+                    cur += timedelta(seconds=gt.RUSH_HEADWAY if headway == "rush" else headway)
+            if last_dt is not None and trains and prev_headway is not None:
+                min_gap = min(gt.headway_seconds(prev_headway), gt.headway_seconds(headway))
+                trains = [x for x in trains if _legacy_time_gap(last_dt, _legacy_parse_time(x)) >= min_gap]
+            all_trains.extend((x, period_type) for x in trains)
+            if trains:
+                last_dt = _legacy_parse_time(trains[-1])
+            prev_headway = headway
+        seen = {}
+        for x, p in all_trains:
+            seen.setdefault(x, p)
+        return sorted(seen.items())
+
+    trains_m, trains_u = departures(slots_motijheel), departures(slots_uttara)
+    offsets = {
+        p: (_legacy_station_offsets(gt.JOURNEY_TIMES_TO_MOTIJHEEL, p, "Motijheel"),
+            _legacy_station_offsets(gt.JOURNEY_TIMES_TO_UTTARA, p, "Uttara North"))
+        for p in gt.PERIOD_TYPES
+    }
+    ends = {"Motijheel": ("Uttara North", "Motijheel"), "Uttara North": ("Motijheel", "Uttara North")}
+    timetable = {}
+    for station, _ in gt.JOURNEY_TIMES_TO_MOTIJHEEL:
+        timetable[station] = {}
+        for idx, (direction, trains) in enumerate((("Motijheel", trains_m), ("Uttara North", trains_u))):
+            times = []
+            for dep, period in trains:
+                arrival = _legacy_parse_time(dep) + timedelta(seconds=offsets[period][idx][station])
+                if station not in ends[direction] and station not in gt.NO_DWELL_STATIONS:
+                    arrival += timedelta(seconds=_legacy_get_wait_time(station, period, direction))
+                times.append(_legacy_format_time(arrival))
+            timetable[station][direction] = times
+    return timetable
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    slots_m = synthetic_slots(5000)
+    slots_u = synthetic_slots(5000, start_sec=3 * 3600 + 600)
+
+    new = gt.build_schedule(slots_m, slots_u, log=gt.quiet)
+    old = legacy_build(slots_m, slots_u)
+    assert new == old, "integer engine output differs from legacy output"
+    trains = len(new["Uttara North"]["Motijheel"]) + len(new["Uttara North"]["Uttara North"])
+
+    t_old = best_of(lambda: legacy_build(slots_m, slots_u))
+    vectorize_min = gt.VECTORIZE_MIN_TRAINS
+    gt.VECTORIZE_MIN_TRAINS = float("inf")
+    try:
+        assert gt.build_schedule(slots_m, slots_u, log=gt.quiet) == old
+        t_new = best_of(lambda: gt.build_schedule(slots_m, slots_u, log=gt.quiet))
+    finally:
+        gt.VECTORIZE_MIN_TRAINS = vectorize_min
+
+    print(f"Synthetic day: {trains} trains × {len(new)} stations")
+    print(f"  legacy datetime loop : {t_old * 1000:8.1f} ms")
+    print(f"  integer engine       : {t_new * 1000:8.1f} ms  ({t_old / t_new:.1f}× faster)")
+
+    if gt.np is not None:
+        gt._time_string_table()  # one-off lookup table, shared by every later run
+        t_vec = best_of(lambda: gt.build_schedule(slots_m, slots_u, log=gt.quiet))
+        print(f"  NumPy matrix builder : {t_vec * 1000:8.1f} ms  ({t_old / t_vec:.1f}× faster)")
+    else:
+        print("  NumPy matrix builder : skipped (NumPy not installed)")
+
+
+if __name__ == "__main__":
+    main()
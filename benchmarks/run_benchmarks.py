@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the timetable generator pipeline.
+
+Times read_config_file, parse_slots, generate_train_times,
+compute_station_offsets and the build_schedule fill loop on synthetic
+configs at 1×, 10× and 100× today's slot and train counts, plus a
+line-length scaling case (16 → 100 stations) and configs with 30 and 300
+schedule sections.
+
+Results are written as JSON so runs can be compared across commits:
+
+    python3 benchmarks/run_benchmarks.py --output before.json
+    ... change code ...
+    python3 benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from contextlib import nullcontext
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from synthetic import gt  # noqa: E402
+from timetable_delay import DelayModel, simulate_batch  # noqa: E402
+
+SCALES = (1, 10, 100)
+LINE_LENGTHS = (16, 32, 64, 100)
+SECTION_COUNTS = (30, 300)
+REGRESSION_THRESHOLD = 1.10   # flag cases more than 10% slower than the baseline
+
+
+def _cold(fn):
+    """fn with the generator's parse caches cleared before every call, so each loop parses from scratch."""
+    def run():
+        gt.parse_slot.cache_clear()
+        gt.parse_time_seconds.cache_clear()
+        return fn()
+    return run
+
+
+def measure(fn, repeat: int, min_time: float) -> dict:
+    """Time fn with timeit: pick a loop count filling min_time, then take `repeat` samples.
+
+    Every loop starts with cold parse caches (see _cold).
+    """
+    timer = timeit.Timer(_cold(fn))
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(number, int(number * min_time / max(elapsed, 1e-9)))
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "best": min(samples),
+        "median": statistics.median(samples),
+        "loops": number,
+        "repeat": repeat,
+    }
+
+
+def build_cases(tmpdir: str) -> dict:
+    """name → (zero-argument callable, context manager factory it runs inside)."""
+    cases = {}
+
+    for scale in SCALES:
+        config_path = os.path.join(tmpdir, f"config-{scale}x.md")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write(synthetic.config_text(scale))
+        section = "\n".join(synthetic.slot_lines(scale))
+        slots_motijheel = synthetic.slots(scale)
+        slots_uttara = synthetic.slots(scale, offset=45 * 60)
+
+        cases[f"read_config_file[{scale}x]"] = (lambda p=config_path: gt.read_config_file(p), nullcontext)
+        cases[f"parse_slots[{scale}x]"] = (lambda t=section: gt.parse_slots(t), nullcontext)
+        cases[f"generate_train_times[{scale}x]"] = (lambda s=slots_motijheel: [
+            gt.generate_train_times(start, end, headway) for start, end, headway, _ in s
+        ], nullcontext)
+        cases[f"build_schedule[{scale}x]"] = (
+            lambda m=slots_motijheel, u=slots_uttara: gt.build_schedule(m, u, gt.quiet), nullcontext)
+        plans = gt.plan_schedule(slots_motijheel, slots_uttara, gt.quiet)
+        cases[f"plan_circulation[{scale}x]"] = (lambda p=plans: gt.plan_circulation(p), nullcontext)
+        if scale == 1:
+            # Synthetic scales above 1x run trains closer than MIN_HEADWAY, so
+            # every delay reaches the rest of the day and the sweep is quadratic
+            model = DelayModel(plans)
+            cases[f"delay_sweep[{scale}x]"] = (
+                lambda m=model: simulate_batch(m, m.origin_sweep(300)), nullcontext)
+
+    for n_sections in SECTION_COUNTS:
+        config_path = os.path.join(tmpdir, f"config-{n_sections}-sections.md")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write(synthetic.config_text(1, extra_sections=n_sections - 3))
+        cases[f"read_config_file[{n_sections} sections]"] = (lambda p=config_path: gt.read_config_file(p), nullcontext)
+
+    slots_motijheel, slots_uttara = synthetic.slots(1), synthetic.slots(1, offset=45 * 60)
+    for n_stations in LINE_LENGTHS:
+        line = partial(synthetic.synthetic_line, n_stations)
+
+        def offsets():
+            for period in gt.PERIOD_TYPES:
+                for direction, journey in gt.JOURNEY_TABLES.items():
+                    gt.compute_station_offsets(journey, period, direction)
+        cases[f"compute_station_offsets[{n_stations} stations]"] = (offsets, line)
+        cases[f"build_schedule[{n_stations} stations]"] = (
+            lambda: gt.build_schedule(slots_motijheel, slots_uttara, gt.quiet), line)
+
+    return cases
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Names of cases slower than the baseline by more than REGRESSION_THRESHOLD."""
+    regressions = []
+    print(f"\n{'Case':<42} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, current in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"{name:<42} {'—':>10} {current['best'] * 1e3:>8.3f}ms {'new':>7}")
+            continue
+        ratio = current["best"] / before["best"]
+        flag = "  ⚠" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"{name:<42} {before['best'] * 1e3:>8.3f}ms {current['best'] * 1e3:>8.3f}ms {ratio:>6.2f}×{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Timetable generator benchmarks")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON to PATH")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a previous results JSON")
+    parser.add_argument("--filter", metavar="TEXT", help="only run cases whose name contains TEXT")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case (default: 5)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per sample (default: 0.2)")
+    parser.add_argument("--quick", action="store_true", help="skip the 100x cases and take 3 short samples")
+    args = parser.parse_args(argv)
+
+    repeat, min_time = (3, 0.05) if args.quick else (args.repeat, args.min_time)
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": getattr(gt.np, "__version__", None),
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, (fn, context) in build_cases(tmpdir).items():
+            if args.filter and args.filter not in name:
+                continue
+            if args.quick and "[100x]" in name:
+                continue
+            with context():
+                stats = measure(fn, repeat, min_time)
+            results["results"][name] = stats
+            print(f"{name:<42} best {stats['best'] * 1e3:>9.3f} ms   median {stats['median'] * 1e3:>9.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print(f"\n⚠ {len(regressions)} case(s) slower than baseline by more than "
+                  f"{(REGRESSION_THRESHOLD - 1):.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Synthetic inputs for the generator benchmarks.
+
+Scale 1 matches today's weekday config (9 slots and ~115 trains per
+direction between 06:30 and 22:00); scale N has N times the slots and N
+times the trains in the same service span.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import generate_timetable as gt  # noqa: E402
+
+SERVICE_START = 6 * 3600 + 30 * 60   # 06:30
+SERVICE_END = 22 * 3600              # 22:00
+BASE_SLOTS = 9
+BASE_TRAINS = 115
+
+
+def _hhmm(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+
+def slot_lines(scale: int, offset: int = 0) -> list:
+    """'START | END | M:SS' lines for one direction at the given scale."""
+    n_slots = BASE_SLOTS * scale
+    span = SERVICE_END - SERVICE_START
+    headway = max(1, span // (BASE_TRAINS * scale))
+    # Slot boundaries on whole minutes, as config times have minute precision
+    bounds = [SERVICE_START + offset + (span * i // n_slots) // 60 * 60 for i in range(n_slots + 1)]
+    return [
+        f"{_hhmm(a)} | {_hhmm(b)} | {gt.format_duration(headway)}"
+        for a, b in zip(bounds, bounds[1:]) if b > a
+    ]
+
+
+def config_text(scale: int, extra_sections: int = 0) -> str:
+    """A full timetable-config.md with weekdays/friday/saturday sections at the given scale.
+
+    extra_sections adds that many more schedules ("## EXTRA1 Schedule", ...).
+    """
+    motijheel = "\n".join(slot_lines(scale))
+    uttara = "\n".join(slot_lines(scale, offset=45 * 60))
+    sections = []
+    titles = ["WEEKDAYS (Sunday to Thursday)", "FRIDAY", "SATURDAY (and Public Holidays)"]
+    for title in titles + [f"EXTRA{i}" for i in range(1, extra_sections + 1)]:
+        sections.append(
+            f"## {title} Schedule\n\n"
+            f"### Platform 1: Trains towards Motijheel\n\n```\nMOTIJHEEL_SLOTS:\n{motijheel}\n```\n\n"
+            f"### Platform 2: Trains towards Uttara North\n\n```\nUTTARA_SLOTS:\n{uttara}\n```\n\n---\n"
+        )
+    return "# Synthetic MRT-6 Timetable Configuration\n\n---\n\n" + "\n".join(sections)
+
+
+def slots(scale: int, offset: int = 0) -> list:
+    """Parsed slot tuples for one direction at the given scale."""
+    return gt.parse_slots("\n".join(slot_lines(scale, offset)))
+
+
+@contextmanager
+def synthetic_line(n_stations: int):
+    """Temporarily replace the MRT-6 tables with a line of n_stations stations.
+
+    Stations reuse the real names (so DWELL_OVERRIDES and NO_DWELL_STATIONS
+    still apply) and are padded with extra stops at 1:45 each.
+    """
+    real = [s for s, _ in gt.JOURNEY_TIMES_TO_MOTIJHEEL]
+    keep = min(n_stations, len(real)) - 1
+    names = real[:keep] + [f"Extra {i}" for i in range(1, n_stations - keep)] + real[-1:]
+    to_motijheel = [(names[0], "0:00")] + [(s, "1:45") for s in names[1:]]
+    to_uttara = [(s, "0:00" if i == 0 else "1:45") for i, s in enumerate(reversed(names))]
+
+    saved = {attr: getattr(gt, attr) for attr in
+             ("JOURNEY_TIMES_TO_MOTIJHEEL", "JOURNEY_TIMES_TO_UTTARA", "JOURNEY_TABLES")}
+    gt.JOURNEY_TIMES_TO_MOTIJHEEL = to_motijheel
+    gt.JOURNEY_TIMES_TO_UTTARA = to_uttara
+    gt.JOURNEY_TABLES = {"Motijheel": to_motijheel, "Uttara North": to_uttara}
+    gt.get_dwell_table(refresh=True)
+    try:
+        yield names
+    finally:
+        for attr, value in saved.items():
+            setattr(gt, attr, value)
+        gt.get_dwell_table(refresh=True)
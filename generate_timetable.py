@@ -7,10 +7,28 @@ Uses inter-station journey times (MM:SS) + station wait/dwell times.
 Rush headway is a fixed 6:00 interval for consecutive trains.
 """
 
+import argparse
+import cProfile
+import gzip
+import hashlib
+import heapq
 import json
-import re
+import os
+import pstats
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from functools import lru_cache, partial
+from itertools import accumulate
+from typing import Callable, List, Dict, NamedTuple, Tuple
+
+try:  # Optional: vectorized station-time matrix for large scenarios
+    import numpy as np
+except ImportError:  # pragma: no cover - pure-Python fallback
+    np = None
 
 
 def parse_duration(dur_str: str) -> int:
@@ -19,6 +37,15 @@ def parse_duration(dur_str: str) -> int:
     return int(parts[0]) * 60 + int(parts[1])
 
 
+def format_duration(seconds: int) -> str:
+    """Format a duration in seconds as M:SS (the inverse of parse_duration)."""
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def quiet(_msg):
+    """A log callback that discards messages."""
+
+
 # ── Inter-station journey times (travel time from the PREVIOUS station) ──
 # Edit these values to match actual travel times between consecutive stations.
 # Format: (station_name, "M:SS")  — time it takes to reach this station from the one above it.
@@ -117,10 +144,100 @@ DWELL_OVERRIDES: Dict[tuple, any] = {
 # "offpeak" is a fixed 8:00 (480s).
 RUSH_HEADWAY = 360            # fixed: 6:00
 OFFPEAK_HEADWAY = 480        # 8:00
+# Closest a train may follow the one ahead of it (signalling limit); delays
+# pass to following trains through it (see timetable_delay.py)
+MIN_HEADWAY = 150             # 2:30
+
+# ── Fleet circulation ──
+# Trainsets available to the line, and the minimum time a trainset spends at a
+# terminal between arriving and leaving again (see plan_circulation).
+FLEET_SIZE = 24
+MIN_TURNAROUND = 240          # 4:00
 
 # Stations where dwell time is NOT added (unverified travel times)
 NO_DWELL_STATIONS = {"Shahbag", "Dhaka University", "Bangladesh Secretariat"}
 
+# Period types a slot can carry (see parse_slot)
+PERIOD_TYPES = ("rush", "offpeak", "custom")
+
+SECONDS_PER_DAY = 86400
+
+# Directions with at least this many trains use the NumPy matrix builder
+# (when NumPy is installed); smaller ones are faster in pure Python.
+VECTORIZE_MIN_TRAINS = 1000
+
+
+# ── Instrumentation ──
+# Stage timers and counters for one generator run. Reported by --profile and
+# written as JSON by --metrics so CI can trend them.
+
+class Metrics:
+    """Per-stage timers and counters.
+
+    Stages nest: time spent in an inner stage is not counted in the outer
+    one, so stage times add up to the instrumented total. Set enabled to
+    False to make stage() a no-op in tight loops (e.g. the headway optimizer).
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        self.stages: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self._stack: List[list] = []   # [stage name, time it last started/resumed]
+
+    def stage(self, name: str):
+        return self._timed_stage(name) if self.enabled else _NO_STAGE
+
+    @contextmanager
+    def _timed_stage(self, name: str):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.stages[parent[0]] = self.stages.get(parent[0], 0.0) + now - parent[1]
+        frame = [name, now]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stack.pop()
+            self.stages[name] = self.stages.get(name, 0.0) + now - frame[1]
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self) -> dict:
+        return {"stages": dict(self.stages), "calls": dict(self.calls), "counters": dict(self.counters)}
+
+    def merge(self, snapshot: dict):
+        """Add a snapshot taken in another process (see generate_schedules_parallel)."""
+        for name, seconds in snapshot["stages"].items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, calls in snapshot["calls"].items():
+            self.calls[name] = self.calls.get(name, 0) + calls
+        for name, n in snapshot["counters"].items():
+            self.count(name, n)
+
+    def report_lines(self) -> List[str]:
+        total = sum(self.stages.values()) or 1.0
+        lines = [f"{'Stage':<20} {'Time (ms)':>10} {'Share':>7} {'Calls':>7}"]
+        for name, seconds in sorted(self.stages.items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<20} {seconds * 1000:>10.2f} {seconds / total:>7.1%} {self.calls.get(name, 0):>7}")
+        lines.append("")
+        lines.extend(f"{name:<28} {n:>8}" for name, n in self.counters.items())
+        return lines
+
+
+_NO_STAGE = nullcontext()
+metrics = Metrics()
+
 
 def _time_gap(dt_a: datetime, dt_b: datetime) -> float:
     """Return the gap in seconds between two datetimes, handling midnight wrap."""
@@ -130,15 +247,21 @@ def _time_gap(dt_a: datetime, dt_b: datetime) -> float:
     return gap
 
 
-def get_wait_time(station: str, period_type: str, direction: str = None) -> int:
+def get_wait_time(station: str, period_type: str, direction: str = None, line: "Line" = None) -> int:
     """Get the dwell/wait time in seconds for a station during a given period.
+
+    This is the resolution rule the compiled dwell table is built from
+    (see compile_dwell_table); generation reads the table instead.
     
-    Looks up DWELL_OVERRIDES with decreasing specificity:
+    Looks up the line's dwell overrides (DWELL_OVERRIDES for MRT-6) with
+    decreasing specificity:
       (period, direction, station) → (period, direction, "*") →
-      (period, "*", station) → ("*", "*", station) → DEFAULT_WAIT
+      (period, "*", station) → ("*", "*", station) → default wait
     """
+    line = line or default_line()
+
     def _resolve(val):
-        return WAIT_CATEGORIES[val] if isinstance(val, str) else int(val)
+        return line.wait_categories[val] if isinstance(val, str) else int(val)
 
     d = direction or "*"
     # Check from most specific to least specific
@@ -148,22 +271,323 @@ def get_wait_time(station: str, period_type: str, direction: str = None) -> int:
         (period_type, "*", station),
         ("*", "*", station),
     ]:
-        if key in DWELL_OVERRIDES:
-            return _resolve(DWELL_OVERRIDES[key])
+        if key in line.dwell_overrides:
+            return _resolve(line.dwell_overrides[key])
+
+    return line.wait_categories[line.default_wait]
 
-    return WAIT_CATEGORIES[DEFAULT_WAIT]
 
+# ── Line network ──
+# A Line bundles everything that is specific to one metro line: its two
+# directions (in platform order), station list, run times, dwell rules,
+# train-ID codes, config slot labels and output files. The module tables
+# above define the built-in MRT-6 line; further lines (MRT-1, MRT-5, ...) are
+# loaded from JSON data files with load_line and generated in the same run.
+
+JOURNEY_TABLES = {
+    "Motijheel":    JOURNEY_TIMES_TO_MOTIJHEEL,
+    "Uttara North": JOURNEY_TIMES_TO_UTTARA,
+}
+
+# Short direction codes used in train IDs
+DIRECTION_CODES = {
+    "Motijheel":    "MJ",
+    "Uttara North": "UN",
+}
+
+# Config section label holding each direction's timing slots
+SLOT_LABELS = {
+    "Motijheel":    "MOTIJHEEL_SLOTS",
+    "Uttara North": "UTTARA_SLOTS",
+}
+
+# Schedule key → (output file suffix, display name); the suffix follows the line's output prefix
+SCHEDULE_TYPES = {
+    "weekdays": ("",     "Weekdays (Sun-Thu)"),
+    "friday":   ("-fri", "Friday"),
+    "saturday": ("-sat", "Saturday"),
+}
+
+
+def schedule_for_date(date, overrides: Dict[str, str] = None) -> str:
+    """Schedule key for a date — same day-of-week rule as getTrainTimesFile in docs/script.js.
+
+    overrides maps ISO dates ("2026-12-16") to a schedule key, e.g. "saturday"
+    for public holidays.
+    """
+    if overrides:
+        key = overrides.get(date.strftime("%Y-%m-%d"))
+        if key:
+            return key
+    weekday = date.weekday()   # Monday = 0 … Friday = 4, Saturday = 5
+    if weekday == 4:
+        return "friday"
+    if weekday == 5:
+        return "saturday"
+    return "weekdays"
+
+
+class Line:
+    """One metro line: two directions over one station list, with run times and dwell rules."""
+
+    def __init__(self, name: str, journey_tables: Dict[str, List[Tuple[str, str]]],
+                 direction_codes: Dict[str, str], slot_labels: Dict[str, str], output_prefix: str,
+                 wait_categories: Dict[str, int], default_wait: str, dwell_overrides: Dict[tuple, any],
+                 no_dwell_stations, config_path: str = "timetable-config.md", schedule_names: Dict[str, str] = None,
+                 fleet_size: int = FLEET_SIZE, min_turnaround: int = MIN_TURNAROUND,
+                 min_headway: int = MIN_HEADWAY):
+        self.name = name
+        self.journey_tables = journey_tables      # direction → [(station, "M:SS")], platform order
+        self.directions = list(journey_tables)
+        self.station_names = [s for s, _ in journey_tables[self.directions[0]]]
+        self.station_index = {s: i for i, s in enumerate(self.station_names)}
+        self.direction_codes = direction_codes
+        self.slot_labels = slot_labels
+        self.output_prefix = output_prefix
+        self.wait_categories = wait_categories
+        self.default_wait = default_wait
+        self.dwell_overrides = dwell_overrides
+        self.no_dwell_stations = set(no_dwell_stations)
+        self.config_path = config_path
+        self.fleet_size = fleet_size
+        self.min_turnaround = min_turnaround   # seconds
+        self.min_headway = min_headway         # seconds
+        names = schedule_names or {}
+        self.schedules = {
+            key: (f"{output_prefix}{suffix}.json", names.get(key, display))
+            for key, (suffix, display) in SCHEDULE_TYPES.items()
+        }
+        self._dwell_table = None
+
+    def dwell_table(self, refresh: bool = False) -> Dict[str, Dict[str, List[int]]]:
+        """The line's compiled dwell table (compiled on first use)."""
+        if self._dwell_table is None or refresh:
+            self._dwell_table = compile_dwell_table(line=self)
+        return self._dwell_table
+
+    def schedule_output(self, key: str, title: str) -> Tuple[str, str]:
+        """(output file, display name) of a schedule; keys beyond SCHEDULE_TYPES are named after their section."""
+        return self.schedules.get(key) or (f"{self.output_prefix}-{key}.json", title)
+
+    def __repr__(self):
+        return f"Line({self.name!r}, {' ↔ '.join(self.directions)}, {len(self.station_names)} stations)"
+
+
+_default_line = None
+
+
+def default_line() -> Line:
+    """The built-in MRT-6 line, built from the module tables on first use."""
+    global _default_line
+    if _default_line is None:
+        _default_line = Line("MRT-6", JOURNEY_TABLES, DIRECTION_CODES, SLOT_LABELS, "docs/mrt-6",
+                             WAIT_CATEGORIES, DEFAULT_WAIT, DWELL_OVERRIDES, NO_DWELL_STATIONS)
+    return _default_line
+
+
+def load_line(path: str) -> Line:
+    """Load a line from a JSON data file (the layout written by export_line).
+
+    Both directions must list the same stations, the second in reverse
+    order. Dwell overrides are checked with validate_dwell_overrides.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    try:
+        directions = data["directions"]
+        if len(directions) != 2:
+            raise ValueError(f"expected 2 directions, found {len(directions)}")
+        journey_tables = {d["name"]: [(station, dur) for station, dur in d["journey_times"]] for d in directions}
+        forward, backward = ([s for s, _ in table] for table in journey_tables.values())
+        if forward != backward[::-1]:
+            raise ValueError("the second direction must visit the first direction's stations in reverse order")
+        for table in journey_tables.values():
+            for _, dur in table:
+                parse_duration(dur)
+        line = Line(
+            name=data["name"],
+            journey_tables=journey_tables,
+            direction_codes={d["name"]: d["code"] for d in directions},
+            slot_labels={d["name"]: d["slots"] for d in directions},
+            output_prefix=data["output"],
+            wait_categories=data.get("wait_categories", WAIT_CATEGORIES),
+            default_wait=data.get("default_wait", DEFAULT_WAIT),
+            dwell_overrides={tuple(key): value for *key, value in data.get("dwell_overrides", [])},
+            no_dwell_stations=data.get("no_dwell_stations", []),
+            config_path=data["config"],
+            schedule_names=data.get("schedule_names") or {
+                key: f"{data['name']} {display}" for key, (_, display) in SCHEDULE_TYPES.items()
+            },
+            fleet_size=int(data.get("fleet_size", FLEET_SIZE)),
+            min_turnaround=parse_duration(data["min_turnaround"]) if "min_turnaround" in data else MIN_TURNAROUND,
+            min_headway=parse_duration(data["min_headway"]) if "min_headway" in data else MIN_HEADWAY,
+        )
+    except (KeyError, TypeError, ValueError, IndexError) as e:
+        raise ValueError(f"{path}: invalid line definition: {e}") from None
 
-def compute_station_offsets(journey_times: List[Tuple[str, str]], period_type: str, direction: str = None) -> Dict[str, int]:
+    problems = validate_dwell_overrides(line=line)
+    if problems:
+        raise ValueError(f"{path}: invalid dwell rules:\n  " + "\n  ".join(problems))
+    return line
+
+
+def export_line(output_file: str, line: Line = None):
+    """Write a line as a JSON data file that load_line reads (a template for new lines)."""
+    line = line or default_line()
+    data = {
+        "name": line.name,
+        "config": line.config_path,
+        "output": line.output_prefix,
+        "schedule_names": {key: name for key, (_, name) in line.schedules.items()},
+        "fleet_size": line.fleet_size,
+        "min_turnaround": format_duration(line.min_turnaround),
+        "min_headway": format_duration(line.min_headway),
+        "directions": [
+            {
+                "name": direction,
+                "code": line.direction_codes[direction],
+                "slots": line.slot_labels[direction],
+                "journey_times": [list(stop) for stop in line.journey_tables[direction]],
+            }
+            for direction in line.directions
+        ],
+        "wait_categories": line.wait_categories,
+        "default_wait": line.default_wait,
+        "no_dwell_stations": sorted(line.no_dwell_stations),
+        "dwell_overrides": [list(key) + [value] for key, value in line.dwell_overrides.items()],
+    }
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def network(config_path: str = "timetable-config.md", lines: List[Line] = ()) -> List[Tuple[Line, str]]:
+    """(line, config path) of MRT-6, read from config_path, and of every further line."""
+    return [(default_line(), config_path)] + [(line, line.config_path) for line in lines]
+
+
+# ── Compiled dwell table ──
+# A line's dwell overrides, wait categories, default wait and no-dwell stations
+# resolved once into table[period][direction][station_index] → dwell seconds
+# actually applied. station_index follows line order (the first direction's
+# route); the origin and terminal of each direction and no-dwell stations hold 0.
+
+
+def compile_dwell_table(journey_tables: Dict[str, List[Tuple[str, str]]] = None,
+                        station_names: List[str] = None, line: Line = None) -> Dict[str, Dict[str, List[int]]]:
+    """Resolve every (period, direction, station) dwell once via get_wait_time."""
+    line = line or default_line()
+    journey_tables = journey_tables or line.journey_tables
+    station_names = station_names or line.station_names
+
+    table: Dict[str, Dict[str, List[int]]] = {}
+    for period in PERIOD_TYPES:
+        table[period] = {}
+        for direction, journey_times in journey_tables.items():
+            endpoints = (journey_times[0][0], journey_times[-1][0])
+            table[period][direction] = [
+                0 if station in endpoints or station in line.no_dwell_stations
+                else get_wait_time(station, period, direction, line)
+                for station in station_names
+            ]
+    return table
+
+
+def get_dwell_table(refresh: bool = False, line: Line = None) -> Dict[str, Dict[str, List[int]]]:
+    """Return the compiled dwell table of a line (MRT-6 by default), compiled on first use.
+
+    Pass refresh=True after editing DWELL_OVERRIDES, JOURNEY_TABLES or the other
+    module tables at runtime; this also rebuilds the MRT-6 line from them.
+    """
+    global _default_line
+    if line is None:
+        if refresh:
+            _default_line = None
+        line = default_line()
+    return line.dwell_table(refresh)
+
+
+def validate_dwell_overrides(overrides: Dict[tuple, any] = None, line: Line = None) -> List[str]:
+    """Return a list of problems with a line's dwell overrides (empty when valid).
+
+    Flags keys naming unknown periods, directions or stations, and values that
+    are neither a wait category name nor a number of seconds.
+    """
+    line = line or default_line()
+    overrides = line.dwell_overrides if overrides is None else overrides
+    journey_tables = line.journey_tables
+    known_stations = {s for table in journey_tables.values() for s, _ in table}
+    problems = []
+
+    for key, value in overrides.items():
+        if not (isinstance(key, tuple) and len(key) == 3):
+            problems.append(f"{key!r}: key must be a (period, direction, station) tuple")
+            continue
+        period, direction, station = key
+        if period != "*" and period not in PERIOD_TYPES:
+            problems.append(f"{key!r}: unknown period '{period}' (expected one of {', '.join(PERIOD_TYPES)} or '*')")
+        if direction != "*" and direction not in journey_tables:
+            problems.append(f"{key!r}: unknown direction '{direction}' (expected one of {', '.join(journey_tables)} or '*')")
+        if station != "*" and station not in known_stations:
+            problems.append(f"{key!r}: unknown station '{station}'")
+        if isinstance(value, str):
+            if value not in line.wait_categories:
+                problems.append(f"{key!r}: unknown wait category '{value}' (expected one of {', '.join(line.wait_categories)})")
+        elif not isinstance(value, (int, float)) or isinstance(value, bool):
+            problems.append(f"{key!r}: value must be a wait category or seconds, got {value!r}")
+
+    if line.default_wait not in line.wait_categories:
+        problems.append(f"DEFAULT_WAIT: unknown wait category '{line.default_wait}'")
+    for station in sorted(line.no_dwell_stations - known_stations):
+        problems.append(f"NO_DWELL_STATIONS: unknown station '{station}'")
+
+    return problems
+
+
+def format_dwell_table(table: Dict[str, Dict[str, List[int]]] = None, line: Line = None) -> str:
+    """Render the compiled dwell table as a text matrix (stations × period/direction)."""
+    line = line or default_line()
+    table = table or line.dwell_table()
+    columns = [(period, direction) for period in table for direction in table[period]]
+    headers = [f"{period}→{direction}" for period, direction in columns]
+    name_width = max(len(s) for s in line.station_names)
+
+    lines = [" " * name_width + "  " + "  ".join(headers)]
+    for i, station in enumerate(line.station_names):
+        cells = [f"{table[p][d][i]:>{len(h)}}" for (p, d), h in zip(columns, headers)]
+        lines.append(f"{station:<{name_width}}  " + "  ".join(cells))
+    return "\n".join(lines)
+
+
+def export_dwell_table(output_file: str, table: Dict[str, Dict[str, List[int]]] = None, line: Line = None):
+    """Write the compiled dwell table to JSON as {period: {direction: {station: seconds}}}."""
+    line = line or default_line()
+    table = table or line.dwell_table()
+    data = {
+        period: {
+            direction: dict(zip(line.station_names, dwells))
+            for direction, dwells in by_direction.items()
+        }
+        for period, by_direction in table.items()
+    }
+    with open(output_file, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def compute_station_offsets(journey_times: List[Tuple[str, str]], period_type: str, direction: str = None,
+                            line: Line = None) -> Dict[str, int]:
     """Compute cumulative arrival offset (seconds) for each station.
 
     offset[0] = 0  (origin — departure time)
     offset[i] = Σ journey[1..i] + Σ wait[1..i-1]
 
     Wait/dwell is added at every intermediate station (not at origin or terminal).
+    Dwell comes from the compiled dwell table; without a known direction it is
+    resolved through get_wait_time's wildcard rules.
     """
+    line = line or default_line()
     offsets: Dict[str, int] = {}
     cumulative = 0
+    dwell = line.dwell_table()[period_type].get(direction)
 
     for i, (station, dur_str) in enumerate(journey_times):
         journey_sec = parse_duration(dur_str)
@@ -172,50 +596,17 @@ def compute_station_offsets(journey_times: List[Tuple[str, str]], period_type: s
 
         # Add dwell time at intermediate stations (not first, not last)
         # Skip dwell for stations with unverified travel times
-        if 0 < i < len(journey_times) - 1 and station not in NO_DWELL_STATIONS:
-            cumulative += get_wait_time(station, period_type, direction)
+        if dwell is not None:
+            cumulative += dwell[line.station_index[station]]
+        elif 0 < i < len(journey_times) - 1 and station not in line.no_dwell_stations:
+            cumulative += get_wait_time(station, period_type, direction, line)
 
     return offsets
 
 
 def parse_time(time_str: str) -> datetime:
     """Parse time string in format HH:MM or HHMM (12 or 24 hour)"""
-    time_str = time_str.strip()
-    
-    # If no colon present, add it (e.g., 730 -> 7:30, 0730 -> 07:30)
-    if ':' not in time_str:
-        # Check if AM/PM is present
-        if 'AM' in time_str.upper() or 'PM' in time_str.upper():
-            # Split the AM/PM part
-            time_part = time_str.split()[0]
-            am_pm = time_str.split()[1]
-            # Add colon to time part
-            if len(time_part) == 3:  # e.g., 730
-                time_str = f"{time_part[0]}:{time_part[1:]} {am_pm}"
-            elif len(time_part) == 4:  # e.g., 0730
-                time_str = f"{time_part[:2]}:{time_part[2:]} {am_pm}"
-        else:
-            # No AM/PM, just add colon
-            if len(time_str) == 3:  # e.g., 730
-                time_str = f"{time_str[0]}:{time_str[1:]}"
-            elif len(time_str) == 4:  # e.g., 0730
-                time_str = f"{time_str[:2]}:{time_str[2:]}"
-    
-    try:
-        # Try parsing HH:MM:SS format first
-        return datetime.strptime(time_str, "%H:%M:%S")
-    except ValueError:
-        pass
-    
-    try:
-        # Try parsing 24-hour HH:MM format
-        return datetime.strptime(time_str, "%H:%M")
-    except ValueError:
-        try:
-            # Try 12-hour format with AM/PM
-            return datetime.strptime(time_str, "%I:%M %p")
-        except ValueError:
-            raise ValueError(f"Invalid time format: {time_str}. Use HH:MM, HH:MM:SS, HHMM, or HH:MM AM/PM")
+    return datetime(1900, 1, 1) + timedelta(seconds=parse_time_seconds(time_str))
 
 
 def format_time(dt: datetime) -> str:
@@ -223,6 +614,43 @@ def format_time(dt: datetime) -> str:
     return dt.strftime("%H:%M:%S")
 
 
+@lru_cache(maxsize=4096)
+def parse_time_seconds(time_str: str) -> int:
+    """Parse a config time string to seconds since midnight.
+
+    Accepts H:MM, HH:MM, HH:MM:SS and HMM/HHMM (730, 0730), each optionally
+    followed by AM/PM for the 12-hour clock. Fields are read as integers
+    directly rather than through strptime (memoized; configs repeat few
+    distinct times).
+    """
+    text = time_str.strip()
+    meridiem = text[-2:].upper()
+    if meridiem in ("AM", "PM"):
+        text = text[:-2].rstrip()
+    else:
+        meridiem = None
+    fields = text.split(':')
+    if len(fields) == 1 and len(text) in (3, 4):
+        fields = [text[:-2], text[-2:]]
+    if not 2 <= len(fields) <= 3 or not all(0 < len(f) <= 2 and f.isascii() and f.isdigit() for f in fields):
+        raise ValueError(f"Invalid time format: {time_str}. Use HH:MM, HH:MM:SS, HHMM, or HH:MM AM/PM")
+    hours, minutes, seconds = int(fields[0]), int(fields[1]), int(fields[2]) if len(fields) == 3 else 0
+    if meridiem:
+        if not 1 <= hours <= 12:
+            raise ValueError(f"Invalid time: {time_str}. 12-hour times run from 1:00 to 12:59 AM/PM")
+        hours = hours % 12 + (12 if meridiem == "PM" else 0)
+    if hours > 23 or minutes > 59 or seconds > 59:
+        raise ValueError(f"Invalid time: {time_str}. Hours run to 23, minutes and seconds to 59")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def format_seconds(seconds: int) -> str:
+    """Format seconds since midnight as HH:MM:SS, wrapping past midnight."""
+    hours, rem = divmod(seconds % SECONDS_PER_DAY, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
 def parse_headway(headway_str: str):
     """Parse headway string.
 
@@ -249,6 +677,35 @@ def parse_headway(headway_str: str):
     return int(headway_str) * 60
 
 
+def headway_period_type(headway_str: str) -> str:
+    """Period type a slot's headway selects for station wait times: "rush", "offpeak" or "custom"."""
+    h = headway_str.strip().lower()
+    return h if h in ("rush", "offpeak") else "custom"
+
+
+def headway_seconds(headway) -> int:
+    """Resolve a parsed headway (int seconds or "rush") to seconds."""
+    return RUSH_HEADWAY if headway == "rush" else headway
+
+
+def generate_departure_seconds(start_sec: int, end_sec: int, headway) -> List[int]:
+    """Integer core of generate_train_times.
+
+    start_sec/end_sec are seconds since midnight; returns departures as seconds
+    since midnight (wrapped into 0..86399 for slots crossing midnight).
+    """
+    # Special case: same start and end time means one train at that exact time
+    if start_sec == end_sec:
+        return [start_sec]
+
+    # Handle times crossing midnight
+    if end_sec <= start_sec:
+        end_sec += SECONDS_PER_DAY
+
+    # range() excludes end_sec, matching the "up to but NOT including" rule
+    return [t % SECONDS_PER_DAY for t in range(start_sec, end_sec, headway_seconds(headway))]
+
+
 def generate_train_times(start_time: str, end_time: str, headway) -> List[str]:
     """Generate train departure times based on start, end time and headway.
 
@@ -261,71 +718,185 @@ def generate_train_times(start_time: str, end_time: str, headway) -> List[str]:
 
     Special case: If start_time == end_time, generates exactly one train at that time.
     """
-    start_dt = parse_time(start_time)
-    end_dt = parse_time(end_time)
+    departures = generate_departure_seconds(parse_time_seconds(start_time), parse_time_seconds(end_time), headway)
+    return [format_seconds(t) for t in departures]
 
-    # Special case: same start and end time means one train at that exact time
-    if start_dt == end_dt:
-        return [format_time(start_dt)]
 
-    # Handle times crossing midnight
-    if end_dt <= start_dt:
-        end_dt += timedelta(days=1)
-
-    train_times = []
-    current_time = start_dt
-    # Use < instead of <= to exclude the end time
-    while current_time < end_dt:
-        train_times.append(format_time(current_time))
-        if headway == "rush":
-            interval = RUSH_HEADWAY
-        else:
-            interval = headway
-        current_time += timedelta(seconds=interval)
+@lru_cache(maxsize=4096)
+def parse_slot(text: str) -> tuple:
+    """Parse one 'START | END | HEADWAY' slot line; raises ValueError naming the problem.
+
+    Returns (start_time, end_time, headway, period_type):
+    headway is int (seconds) for fixed, or "rush" for 6:00 fixed;
+    period_type is "rush", "offpeak", or "custom". Memoized by the line's text,
+    as slot lines repeat across schedules and watch-mode reloads.
+    """
+    parts = [p.strip() for p in text.split('|')]
+    if len(parts) != 3:
+        raise ValueError("expected START | END | HEADWAY")
+    start_time, end_time, headway_str = parts
+    parse_time_seconds(start_time)
+    parse_time_seconds(end_time)
+    try:
+        headway = parse_headway(headway_str)
+    except ValueError:
+        raise ValueError(f"invalid headway {headway_str!r} (use rush, offpeak, MM:SS or minutes)") from None
+    if headway_seconds(headway) <= 0:
+        raise ValueError(f"headway {headway_str!r} must be longer than zero")
+    # Determine period type for station wait-time selection
+    return (start_time, end_time, headway, headway_period_type(headway_str))
+
+
+# ── Config tokenizer ──
+# The config is read in one pass over its lines. A "## " header opens a
+# section, a line starting with one of the line's slot labels
+# ("MOTIJHEEL_SLOTS:") opens a slot block in it, and a ``` fence, the next
+# label or the next header closes the block. Every section with slot blocks
+# is a schedule, so a config may define schedules beyond SCHEDULE_TYPES
+# (e.g. "## RAMADAN Schedule", written to docs/mrt-6-ramadan.json).
 
-    return train_times
+class SlotBlock(NamedTuple):
+    label: str
+    line_no: int
+    slots: List[tuple]           # as parse_slot returns them
+    slot_lines: List[int]        # line number of each slot
+
+
+class ConfigSection(NamedTuple):
+    key: str                     # first word of the header, lowercased
+    title: str                   # header text without a trailing "Schedule"
+    line_no: int
+    blocks: Dict[str, SlotBlock]   # slot label → block, in config order
+
+
+class ConfigProblem(NamedTuple):
+    line_no: int
+    level: str                   # "error" (something is skipped) or "warning"
+    message: str
+
+
+def _section_header(text: str) -> Tuple[str, str]:
+    """(key, title) of a "## ..." header line."""
+    title = text[2:].strip()
+    if title.lower().endswith("schedule"):
+        title = title[:-len("schedule")].rstrip()
+    if title.isupper():
+        title = title.title()
+    end = 0
+    while end < len(title) and (title[end].isalnum() or title[end] in "_-"):
+        end += 1
+    return title[:end].lower(), title
+
+
+def _fill_block(block: SlotBlock, lines: List[Tuple[int, str]], problems: List[ConfigProblem]):
+    """Parse (line number, text) slot lines into a block; lines that do not parse become problems."""
+    for number, text in lines:
+        try:
+            block.slots.append(parse_slot(text))
+            block.slot_lines.append(number)
+        except ValueError as e:
+            problems.append(ConfigProblem(number, "error", f"skipping invalid slot line {text!r}: {e}"))
 
 
 def parse_slots(section_text: str) -> List[tuple]:
-    """Parse timing slots from config section.
-    
-    Returns list of (start_time, end_time, headway, period_type) tuples.
-    headway is int (seconds) for fixed, or "rush" for 6:00 fixed.
-    period_type is "rush", "offpeak", or "custom".
+    """Parse the slot lines of one block (the lines under a label such as MOTIJHEEL_SLOTS:).
+
+    Returns list of (start_time, end_time, headway, period_type) tuples, as
+    parse_slot does. Blank lines, comments and code fences are skipped; other
+    lines that do not parse are skipped with a warning naming their line.
     """
-    slots = []
-    lines = section_text.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        # Skip empty lines, comments, and code block markers
-        if not line or line.startswith('#') or line.startswith('```'):
+    block, problems = SlotBlock("", 0, [], []), []
+    lines = [(number, text.strip()) for number, text in enumerate(section_text.split('\n'), 1)]
+    with metrics.stage("slot_parse"):
+        _fill_block(block, [(number, text) for number, text in lines if text and text[0] not in "#`"], problems)
+    for problem in problems:
+        print(f"Warning: line {problem.line_no}: {problem.message}")
+    return block.slots
+
+
+def tokenize_config(text: str, line: Line = None) -> Tuple[Dict[str, ConfigSection], List[ConfigProblem]]:
+    """Schedule sections of a config, by key in config order, and the problems found on the way.
+
+    Sections without slot blocks (notes, instructions) are left out, and a
+    repeated schedule key keeps its first section. Invalid slot lines are
+    dropped and reported with their line number.
+    """
+    line = line or default_line()
+    labels = {line.slot_labels[direction].upper() + ":": line.slot_labels[direction]
+              for direction in line.directions}
+    sections: List[ConfigSection] = []
+    problems: List[ConfigProblem] = []
+    pending: List[Tuple[SlotBlock, List[Tuple[int, str]]]] = []   # blocks and their slot lines
+    section = block = None
+
+    for number, raw in enumerate(text.split('\n'), 1):
+        stripped = raw.strip()
+        if not stripped:
             continue
-        
-        # Parse format: START | END | HEADWAY
-        parts = [p.strip() for p in line.split('|')]
-        if len(parts) == 3:
-            start_time, end_time, headway_str = parts
-            try:
-                headway = parse_headway(headway_str)
-                # Determine period type for station wait-time selection
-                h = headway_str.strip().lower()
-                if h == "rush":
-                    period_type = "rush"
-                elif h == "offpeak":
-                    period_type = "offpeak"
+        first = stripped[0]
+        if first == '#':
+            if raw[:2] == "##" and raw[2:3].isspace():
+                key, title = _section_header(raw)
+                section = ConfigSection(key, title, number, {}) if key else None
+                block = None
+                if section:
+                    sections.append(section)
+            continue   # other headings and comments
+
+        if first.isalpha():
+            colon = stripped.find(':')
+            label = labels.get(stripped[:colon + 1].upper()) if colon > 0 else None
+            if label:
+                block = None
+                if section is None:
+                    problems.append(ConfigProblem(number, "warning", f"{label}: outside a schedule section is ignored"))
+                elif label in section.blocks:
+                    problems.append(ConfigProblem(number, "warning",
+                                                  f"second {label}: block in the {section.key} section is ignored "
+                                                  f"(first at line {section.blocks[label].line_no})"))
                 else:
-                    period_type = "custom"
-                slots.append((start_time, end_time, headway, period_type))
-            except ValueError:
-                print(f"Warning: Skipping invalid line: {line}")
-                continue
-    
-    return slots
+                    block = section.blocks[label] = SlotBlock(label, number, [], [])
+                    block_lines = []
+                    pending.append((block, block_lines))
+                stripped = stripped[colon + 1:].strip()   # slots may follow the label on its line
+                if not stripped:
+                    continue
+        if block is None:
+            continue
+        if first == '`':
+            block = None
+            continue
+        block_lines.append((number, stripped))
+
+    with metrics.stage("slot_parse"):
+        for block, block_lines in pending:
+            _fill_block(block, block_lines, problems)
+
+    schedules: Dict[str, ConfigSection] = {}
+    for section in sections:
+        if not section.blocks:
+            continue
+        if section.key in schedules:
+            problems.append(ConfigProblem(section.line_no, "warning",
+                                          f"second '{section.key}' section is ignored "
+                                          f"(first at line {schedules[section.key].line_no})"))
+            continue
+        schedules[section.key] = section
+        for label in labels.values():
+            if label not in section.blocks:
+                problems.append(ConfigProblem(section.line_no, "error",
+                                              f"{section.key} section has no {label}: block; "
+                                              f"the {section.key} schedule is not generated"))
+            elif not section.blocks[label].slots:
+                problems.append(ConfigProblem(section.blocks[label].line_no, "warning",
+                                              f"{section.key} {label} block has no slots"))
+    problems.sort(key=lambda p: p.line_no)
+    return schedules, problems
 
 
-def read_config_file(config_path: str = "timetable-config.md") -> Dict[str, Tuple[Tuple[str, str], List[tuple], List[tuple]]]:
-    """Read timetable configuration from markdown file for all schedules"""
+def read_config_sections(config_path: str = "timetable-config.md",
+                         line: Line = None) -> Tuple[Dict[str, ConfigSection], List[ConfigProblem]]:
+    """Tokenize a config file (see tokenize_config)."""
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -334,239 +905,1274 @@ def read_config_file(config_path: str = "timetable-config.md") -> Dict[str, Tupl
             f"Configuration file '{config_path}' not found!\n"
             f"Please create it or run with the default timetable-config.md"
         )
-    
-    schedule_mapping = {
-        'weekdays': ('docs/mrt-6.json', 'Weekdays (Sun-Thu)'),
-        'friday': ('docs/mrt-6-fri.json', 'Friday'),
-        'saturday': ('docs/mrt-6-sat.json', 'Saturday')
+    return tokenize_config(content, line)
+
+
+def read_config_file(config_path: str = "timetable-config.md",
+                     line: Line = None) -> Dict[str, Tuple[Tuple[str, str], List[tuple], List[tuple]]]:
+    """Read timetable configuration from markdown file for all schedules of a line (MRT-6 by default).
+
+    Slots are returned in the line's direction order. Schedules come in
+    SCHEDULE_TYPES order, then any other schedule sections in config order.
+    """
+    line = line or default_line()
+    with metrics.stage("config_read"):
+        sections, problems = read_config_sections(config_path, line)
+        for problem in problems:
+            print(f"Warning: {config_path}:{problem.line_no}: {problem.message}")
+
+        labels = [line.slot_labels[direction] for direction in line.directions]
+        all_schedules = {}
+        for key in list(line.schedules) + [key for key in sections if key not in line.schedules]:
+            section = sections.get(key)
+            if section is None:
+                print(f"Warning: {key} schedule section not found in config file")
+                continue
+            if all(label in section.blocks for label in labels):
+                all_schedules[key] = (line.schedule_output(key, section.title),
+                                      *(section.blocks[label].slots for label in labels))
+        return all_schedules
+
+
+def headway_display(headway) -> str:
+    """Human-readable headway for the console summary."""
+    if headway == "rush":
+        return "rush (6:00)"
+    return format_duration(headway)
+
+
+def iter_slot_departures(slots: List[tuple]):
+    """Expand timing slots one at a time.
+
+    Yields (slot_number, slot, trains, skipped) where trains are departure
+    seconds and skipped counts trains dropped for being closer than
+    min(previous headway, current headway) to the previous slot's last departure.
+    """
+    last_departure = None
+    prev_gap = None
+    for i, slot in enumerate(slots, 1):
+        with metrics.stage("train_generation"):
+            start_time, end_time, headway, _ = slot
+            trains = generate_departure_seconds(parse_time_seconds(start_time), parse_time_seconds(end_time), headway)
+            curr_gap = headway_seconds(headway)
+            metrics.count("trains_generated", len(trains))
+            skipped = 0
+            # Filter out trains too close to the last departure from the previous slot
+            # Use the MINIMUM of previous and current headway as threshold
+            if last_departure is not None and trains and prev_gap is not None:
+                min_gap = min(prev_gap, curr_gap)
+                original_count = len(trains)
+                trains = [t for t in trains if (t - last_departure) % SECONDS_PER_DAY >= min_gap]
+                skipped = original_count - len(trains)
+                metrics.count("trains_removed_gap", skipped)
+            if trains:
+                last_departure = trains[-1]
+            prev_gap = curr_gap
+        yield i, slot, trains, skipped
+
+
+def collect_departures(slots: List[tuple], log: Callable[[str], None] = print) -> List[Tuple[int, str]]:
+    """Generate the departures of one platform from its timing slots.
+
+    Returns a sorted, de-duplicated list of (seconds_of_day, period_type).
+    On duplicates the first period_type wins.
+    """
+    departures: Dict[int, str] = {}
+    kept = 0
+    for i, (start_time, end_time, headway, period_type), trains, skipped in iter_slot_departures(slots):
+        if skipped:
+            log(f"    ↳ Removed {skipped} train(s) too close to previous slot's last departure")
+        with metrics.stage("dedupe"):
+            for t in trains:
+                departures.setdefault(t, period_type)
+        kept += len(trains)
+        log(f"  Slot {i}: {start_time} to {end_time}, headway {headway_display(headway)} → {len(trains)} trains")
+
+    with metrics.stage("dedupe"):
+        result = sorted(departures.items())
+    metrics.count("duplicates_dropped", kept - len(result))
+    metrics.count("trains_scheduled", len(result))
+    return result
+
+
+def slot_train_counts(slots: List[tuple]) -> List[int]:
+    """Number of trains each slot contributes (after the previous-slot gap filter)."""
+    return [len(trains) for _, _, trains, _ in iter_slot_departures(slots)]
+
+
+def compute_departure_offsets(journey_times: List[Tuple[str, str]], station_names: List[str],
+                              period_type: str, direction: str,
+                              arrival_offsets: Dict[str, int] = None, line: Line = None) -> List[int]:
+    """Offset (seconds from origin departure) of the time shown at each station.
+
+    Times shown are DEPARTURE times (arrival + dwell) except at terminal
+    stations and unverified stations (NO_DWELL_STATIONS) which show arrival
+    times — those hold 0 in the compiled dwell table.
+    The result follows the order of station_names.
+    """
+    line = line or default_line()
+    if arrival_offsets is None:
+        arrival_offsets = compute_station_offsets(journey_times, period_type, direction, line)
+    dwell = line.dwell_table()[period_type][direction]
+    return [arrival_offsets[station] + dwell[line.station_index[station]] for station in station_names]
+
+
+def build_station_times(departures: List[Tuple[int, str]], offsets_by_period: Dict[str, List[int]]) -> List[List[str]]:
+    """Return the HH:MM:SS column of every station for one direction.
+
+    departures are (seconds_of_day, period_type) pairs; offsets_by_period maps
+    each period_type to the per-station offsets from compute_departure_offsets.
+    Large directions are built with NumPy when it is available.
+    """
+    with metrics.stage("matrix_fill"):
+        if np is not None and len(departures) >= VECTORIZE_MIN_TRAINS:
+            return build_station_times_vectorized(departures, offsets_by_period)
+
+        n_stations = len(next(iter(offsets_by_period.values())))
+        return [
+            [format_seconds(dep + offsets_by_period[period][i]) for dep, period in departures]
+            for i in range(n_stations)
+        ]
+
+
+def build_time_matrix(departures: List[Tuple[int, str]], offsets_by_period: Dict[str, List[int]]):
+    """Build the (stations × trains) int32 matrix of seconds since midnight.
+
+    The timetable is an outer sum: the departures vector plus the offset
+    vector of each train's period, picked from the stacked per-period
+    offsets by an array of period codes. Requires NumPy.
+    """
+    if np is None:
+        raise ImportError("build_time_matrix requires NumPy (pip install numpy)")
+
+    periods = list(offsets_by_period)
+    period_index = {p: i for i, p in enumerate(periods)}
+    count = len(departures)
+    dep_vector = np.fromiter((dep for dep, _ in departures), dtype=np.int32, count=count)
+    period_codes = np.fromiter((period_index[p] for _, p in departures), dtype=np.intp, count=count)
+    offset_table = np.array([offsets_by_period[p] for p in periods], dtype=np.int32)  # periods × stations
+
+    matrix = offset_table[period_codes].T + dep_vector  # stations × trains
+    np.remainder(matrix, SECONDS_PER_DAY, out=matrix)
+    return matrix
+
+
+@lru_cache(maxsize=1)
+def _time_string_table():
+    """Every HH:MM:SS string of the day, indexable by seconds since midnight."""
+    return np.array([format_seconds(t) for t in range(SECONDS_PER_DAY)], dtype=object)
+
+
+def build_station_times_vectorized(departures: List[Tuple[int, str]],
+                                   offsets_by_period: Dict[str, List[int]]) -> List[List[str]]:
+    """NumPy variant of build_station_times; formats whole station columns at once."""
+    matrix = build_time_matrix(departures, offsets_by_period)
+    table = _time_string_table()
+    return [table[row].tolist() for row in matrix]
+
+
+# Direction offsets keyed by content (run times, dwell rows, station order),
+# so schedules and lines with identical routes share one computation.
+_offsets_cache: Dict[tuple, Dict[str, List[int]]] = {}
+
+
+def compute_direction_offsets(direction: str, line: Line = None) -> Dict[str, List[int]]:
+    """Per-period display offsets (arrival + dwell) of every station for one direction.
+
+    The result is cached and shared; treat it as read-only.
+    """
+    line = line or default_line()
+    journey_times = line.journey_tables[direction]
+    dwell_table = line.dwell_table()
+    key = (tuple(journey_times), tuple(line.station_names),
+           tuple(tuple(dwell_table[period][direction]) for period in PERIOD_TYPES))
+    offsets_by_period = _offsets_cache.get(key)
+    if offsets_by_period is None:
+        offsets_by_period = {}
+        with metrics.stage("offset_computation"):
+            for period in PERIOD_TYPES:
+                arrivals = compute_station_offsets(journey_times, period, direction, line)
+                offsets_by_period[period] = compute_departure_offsets(
+                    journey_times, line.station_names, period, direction, arrivals, line)
+        _offsets_cache[key] = offsets_by_period
+    return offsets_by_period
+
+
+def plan_direction(direction: str, slots: List[tuple],
+                   log: Callable[[str], None] = print,
+                   line: Line = None) -> Tuple[List[Tuple[int, str]], Dict[str, List[int]]]:
+    """Departures and per-period station offsets of one platform (one direction of one schedule).
+
+    Every time shown at station i for a train is departure + offsets_by_period[period][i].
+    """
+    line = line or default_line()
+    platform = line.directions.index(direction) + 1
+    log(f"\nPLATFORM {platform}: Trains towards {direction}")
+    log(f"Found {len(slots)} timing slots")
+    departures = collect_departures(slots, log)
+    log(f"✓ Total trains towards {direction}: {len(departures)}")
+
+    # Station offsets are resolved once per period, outside the train loop
+    return departures, compute_direction_offsets(direction, line)
+
+
+def plan_schedule(slots_motijheel: List[tuple], slots_uttara: List[tuple],
+                  log: Callable[[str], None] = print,
+                  line: Line = None) -> Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[int]]]]:
+    """plan_direction for both platforms of one schedule, keyed by direction.
+
+    The two slot lists follow the line's direction order (Motijheel, then
+    Uttara North on MRT-6).
+    """
+    line = line or default_line()
+    return {
+        direction: plan_direction(direction, slots, log, line)
+        for direction, slots in zip(line.directions, (slots_motijheel, slots_uttara))
     }
-    
-    all_schedules = {}
-    
-    # Extract each schedule's sections
-    for schedule_key, (output_file, schedule_name) in schedule_mapping.items():
-        # Find the schedule section - match the header and content until next ## at start of line
-        section_pattern = rf'##\s+{schedule_key}[^\n]*\n(.*?)(?=\n##\s+\w+|\Z)'
-        section_match = re.search(section_pattern, content, re.IGNORECASE | re.DOTALL)
-        
-        if not section_match:
-            print(f"Warning: {schedule_key} schedule section not found in config file")
-            continue
-        
-        section_content = section_match.group(1)
-        
-        # Extract Motijheel slots from this section
-        motijheel_match = re.search(
-            r'MOTIJHEEL_SLOTS:(.*?)(?=UTTARA_SLOTS:|$)', 
-            section_content, 
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        # Extract Uttara slots from this section
-        uttara_match = re.search(
-            r'UTTARA_SLOTS:(.*?)(?=```\s*$|$)', 
-            section_content, 
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        if motijheel_match and uttara_match:
-            motijheel_slots = parse_slots(motijheel_match.group(1))
-            uttara_slots = parse_slots(uttara_match.group(1))
-            all_schedules[schedule_key] = ((output_file, schedule_name), motijheel_slots, uttara_slots)
-    
-    return all_schedules
 
 
-def generate_schedule(schedule_name: str, output_file: str, slots_motijheel: List[tuple], slots_uttara: List[tuple]):
-    """Generate timetable for a single schedule"""
+def assemble_timetable(columns_by_direction: Dict[str, List[List[str]]],
+                       line: Line = None) -> Dict[str, Dict[str, List[str]]]:
+    """Combine per-direction station columns into {station: {direction: [times]}}."""
+    line = line or default_line()
+    return {
+        station: {direction: columns[i] for direction, columns in columns_by_direction.items()}
+        for i, station in enumerate(line.station_names)
+    }
+
+
+def build_schedule(slots_motijheel: List[tuple], slots_uttara: List[tuple],
+                   log: Callable[[str], None] = print, line: Line = None) -> Dict[str, Dict[str, List[str]]]:
+    """Build the complete timetable for one schedule in memory.
+
+    Returns {station: {"Motijheel": [times], "Uttara North": [times]}}.
+    """
+    plans = plan_schedule(slots_motijheel, slots_uttara, log, line)
+    log("\nCalculating station times (journey + dwell offsets)...")
+    return assemble_timetable({direction: build_station_times(*plan) for direction, plan in plans.items()}, line)
+
+
+def _print_schedule_header(schedule_name: str):
     print("\n" + "=" * 60)
     print(f"GENERATING: {schedule_name}")
     print("=" * 60)
-    
-    # Process Platform 1 (Towards Motijheel)
-    print("\nPLATFORM 1: Trains towards Motijheel")
-    print(f"Found {len(slots_motijheel)} timing slots")
-    
-    # Generate all train times for Motijheel direction
-    all_trains_motijheel = []
-    last_departure_dt = None
-    prev_headway = None
-    for i, (start_time, end_time, headway_sec, period_type) in enumerate(slots_motijheel, 1):
-        trains = generate_train_times(start_time, end_time, headway_sec)
-        # Filter out trains too close to the last departure from the previous slot
-        # Use the MINIMUM of previous and current headway as threshold
-        if last_departure_dt is not None and trains and prev_headway is not None:
-            prev_gap = RUSH_HEADWAY if prev_headway == "rush" else prev_headway
-            curr_gap = RUSH_HEADWAY if headway_sec == "rush" else headway_sec
-            min_gap = min(prev_gap, curr_gap)
-            original_count = len(trains)
-            trains = [t for t in trains
-                      if _time_gap(last_departure_dt, parse_time(t)) >= min_gap]
-            skipped = original_count - len(trains)
-            if skipped:
-                print(f"    ↳ Removed {skipped} train(s) too close to previous slot's last departure")
-        for t in trains:
-            all_trains_motijheel.append((t, period_type))
-        if trains:
-            last_departure_dt = parse_time(trains[-1])
-        prev_headway = headway_sec
-        if headway_sec == "rush":
-            headway_display = "rush (6:00)"
-        else:
-            headway_display = f"{headway_sec // 60}:{headway_sec % 60:02d}"
-        print(f"  Slot {i}: {start_time} to {end_time}, headway {headway_display} → {len(trains)} trains")
-    
-    # Remove duplicates (keep first period_type) and sort
-    seen = {}
-    for t, p in all_trains_motijheel:
-        if t not in seen:
-            seen[t] = p
-    all_trains_motijheel = sorted(seen.items())
-    print(f"✓ Total trains towards Motijheel: {len(all_trains_motijheel)}")
-    
-    # Process Platform 2 (Towards Uttara North)
-    print("\nPLATFORM 2: Trains towards Uttara North")
-    print(f"Found {len(slots_uttara)} timing slots")
-    
-    # Generate all train times for Uttara direction
-    all_trains_uttara = []
-    last_departure_dt = None
-    prev_headway = None
-    for i, (start_time, end_time, headway_sec, period_type) in enumerate(slots_uttara, 1):
-        trains = generate_train_times(start_time, end_time, headway_sec)
-        # Filter out trains too close to the last departure from the previous slot
-        # Use the MINIMUM of previous and current headway as threshold
-        if last_departure_dt is not None and trains and prev_headway is not None:
-            prev_gap = RUSH_HEADWAY if prev_headway == "rush" else prev_headway
-            curr_gap = RUSH_HEADWAY if headway_sec == "rush" else headway_sec
-            min_gap = min(prev_gap, curr_gap)
-            original_count = len(trains)
-            trains = [t for t in trains
-                      if _time_gap(last_departure_dt, parse_time(t)) >= min_gap]
-            skipped = original_count - len(trains)
-            if skipped:
-                print(f"    ↳ Removed {skipped} train(s) too close to previous slot's last departure")
-        for t in trains:
-            all_trains_uttara.append((t, period_type))
-        if trains:
-            last_departure_dt = parse_time(trains[-1])
-        prev_headway = headway_sec
-        if headway_sec == "rush":
-            headway_display = "rush (6:00)"
+
+
+def _write_if_changed(path: str, data: bytes) -> bool:
+    """Write bytes to path unless the file already holds exactly them."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def write_timetable(output_file: str, complete_timetable: Dict[str, Dict[str, List[str]]]) -> bool:
+    """Save a timetable to JSON in the format docs/script.js reads.
+
+    The file is only rewritten when its content changes, so unchanged
+    timetables keep their mtime. Returns True if the file was written.
+    """
+    return _write_if_changed(output_file, json.dumps(complete_timetable, indent=2).encode('utf-8'))
+
+
+# ── Compact output formats ──
+# Alongside the pretty-printed station-major JSON a schedule can be written as:
+#   min      — the same JSON without whitespace                 (mrt-6.min.json)
+#   compact  — departures + per-period station offset vectors   (mrt-6.compact.json)
+#   bin      — the compact model as a little-endian binary file (mrt-6.bin)
+#   trips    — train-major trip records keyed by stable train ID (mrt-6.trips.json)
+#   index    — per-station, per-direction sorted seconds-of-day arrays (mrt-6.index.json)
+# In the compact encodings the time of train j at station i is
+#   (departures[j] + offsets[periods[j]][i]) mod 86400
+# with departures delta-encoded in the JSON variant.
+
+OUTPUT_FORMATS = ("json", "min", "compact", "bin", "trips", "index")
+
+_FORMAT_SUFFIXES = {
+    "json":    ".json",
+    "min":     ".min.json",
+    "compact": ".compact.json",
+    "bin":     ".bin",
+    "trips":   ".trips.json",
+    "index":   ".index.json",
+}
+
+COMPACT_FORMAT_VERSION = 1
+BINARY_MAGIC = b"MRTT"
+
+
+def output_paths(output_file: str, formats=("json",)) -> Dict[str, str]:
+    """Map each requested format to its file path, derived from the JSON output path."""
+    base = output_file[:-len(".json")] if output_file.endswith(".json") else output_file
+    return {fmt: output_file if fmt == "json" else base + _FORMAT_SUFFIXES[fmt] for fmt in formats}
+
+
+def encode_compact(plans: Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[int]]]], line: Line = None) -> dict:
+    """Encode a schedule plan (see plan_schedule) as departures + offset vectors."""
+    line = line or default_line()
+    periods = list(PERIOD_TYPES)
+    period_code = {p: i for i, p in enumerate(periods)}
+    directions = {}
+    for direction, (departures, offsets_by_period) in plans.items():
+        deltas, previous = [], 0
+        for dep, _ in departures:
+            deltas.append(dep - previous)
+            previous = dep
+        directions[direction] = {
+            "departures": deltas,
+            "periods": [period_code[p] for _, p in departures],
+            "offsets": [offsets_by_period[p] for p in periods],
+        }
+    return {
+        "format": "mrt-timetable-compact",
+        "version": COMPACT_FORMAT_VERSION,
+        "stations": line.station_names,
+        "periods": periods,
+        "directions": directions,
+    }
+
+
+def decode_compact(data: dict) -> Dict[str, Dict[str, List[str]]]:
+    """Expand a compact encoding back into the station-major timetable."""
+    stations = data["stations"]
+    columns = {}
+    for direction, encoded in data["directions"].items():
+        departures = list(accumulate(encoded["departures"]))
+        offsets = encoded["offsets"]
+        columns[direction] = [
+            [format_seconds(dep + offsets[code][i]) for dep, code in zip(departures, encoded["periods"])]
+            for i in range(len(stations))
+        ]
+    return {
+        station: {direction: cols[i] for direction, cols in columns.items()}
+        for i, station in enumerate(stations)
+    }
+
+
+def _pack_name(name: str) -> bytes:
+    raw = name.encode('utf-8')
+    return struct.pack("<B", len(raw)) + raw
+
+
+def encode_binary(plans: Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[int]]]], line: Line = None) -> bytes:
+    """Encode a schedule plan in the binary layout (all integers little-endian):
+
+        "MRTT" | uint16 version | uint16 n_stations | uint16 n_periods | uint16 n_directions
+        station names, period names        (each: uint8 byte length + UTF-8)
+        per direction:
+            name | uint32 n_trains
+            uint16[n_periods × n_stations]  station offsets in seconds, period-major
+            uint32[n_trains]                departures, seconds since midnight
+            uint8[n_trains]                 period codes
+    """
+    line = line or default_line()
+    periods = list(PERIOD_TYPES)
+    period_code = {p: i for i, p in enumerate(periods)}
+    parts = [BINARY_MAGIC, struct.pack("<4H", COMPACT_FORMAT_VERSION, len(line.station_names), len(periods), len(plans))]
+    parts.extend(_pack_name(station) for station in line.station_names)
+    parts.extend(_pack_name(period) for period in periods)
+
+    for direction, (departures, offsets_by_period) in plans.items():
+        n = len(departures)
+        offsets = [offset for p in periods for offset in offsets_by_period[p]]
+        if offsets and max(offsets) > 0xFFFF:
+            raise ValueError(f"Station offset above {0xFFFF} s cannot be stored in the binary format")
+        parts.append(_pack_name(direction))
+        parts.append(struct.pack("<I", n))
+        parts.append(struct.pack(f"<{len(offsets)}H", *offsets))
+        parts.append(struct.pack(f"<{n}I", *(dep for dep, _ in departures)))
+        parts.append(struct.pack(f"<{n}B", *(period_code[p] for _, p in departures)))
+    return b"".join(parts)
+
+
+def decode_binary(blob: bytes) -> Dict[str, Dict[str, List[str]]]:
+    """Expand the binary encoding back into the station-major timetable."""
+    if blob[:4] != BINARY_MAGIC:
+        raise ValueError("Not an MRT timetable binary file")
+    version, n_stations, n_periods, n_directions = struct.unpack_from("<4H", blob, 4)
+    if version != COMPACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary timetable version {version}")
+    pos = 12
+
+    def read_name():
+        nonlocal pos
+        length = blob[pos]
+        name = blob[pos + 1:pos + 1 + length].decode('utf-8')
+        pos += 1 + length
+        return name
+
+    stations = [read_name() for _ in range(n_stations)]
+    periods = [read_name() for _ in range(n_periods)]
+    directions = {}
+    for _ in range(n_directions):
+        direction = read_name()
+        (n,) = struct.unpack_from("<I", blob, pos)
+        pos += 4
+        flat = struct.unpack_from(f"<{n_periods * n_stations}H", blob, pos)
+        pos += 2 * n_periods * n_stations
+        departures = struct.unpack_from(f"<{n}I", blob, pos)
+        pos += 4 * n
+        codes = struct.unpack_from(f"<{n}B", blob, pos)
+        pos += n
+        deltas = [b - a for a, b in zip((0,) + departures, departures)]
+        directions[direction] = {
+            "departures": deltas,
+            "periods": list(codes),
+            "offsets": [list(flat[k * n_stations:(k + 1) * n_stations]) for k in range(n_periods)],
+        }
+    return decode_compact({"stations": stations, "periods": periods, "directions": directions})
+
+
+def train_id(direction: str, departure: int, period_type: str, line: Line = None) -> str:
+    """Stable train ID from direction, origin departure and period, e.g. "MJ-063000-custom"."""
+    codes = (line or default_line()).direction_codes
+    return f"{codes[direction]}-{format_seconds(departure).replace(':', '')}-{period_type}"
+
+
+def build_trips(plans: Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[int]]]], line: Line = None) -> dict:
+    """Train-major view of a schedule plan.
+
+    Returns {"routes": {direction: [stations in travel order]},
+             "trips": {train_id: {"direction", "period_type", "arrivals", "departures"}}}
+    where arrivals/departures follow the direction's route. Departures equal
+    the times in the station-major JSON; they match arrivals at the origin,
+    the terminal and NO_DWELL_STATIONS.
+    """
+    line = line or default_line()
+    dwell_table = line.dwell_table()
+    routes, trips = {}, {}
+    for direction, (departures, _) in plans.items():
+        journey_times = line.journey_tables[direction]
+        route = [station for station, _ in journey_times]
+        routes[direction] = route
+
+        arrival_offsets, departure_offsets = {}, {}
+        for period in PERIOD_TYPES:
+            offsets = compute_station_offsets(journey_times, period, direction, line)
+            dwell = dwell_table[period][direction]
+            arrival_offsets[period] = [offsets[station] for station in route]
+            departure_offsets[period] = [offsets[station] + dwell[line.station_index[station]] for station in route]
+
+        for dep, period in departures:
+            trips[train_id(direction, dep, period, line)] = {
+                "direction": direction,
+                "period_type": period,
+                "arrivals": [format_seconds(dep + offset) for offset in arrival_offsets[period]],
+                "departures": [format_seconds(dep + offset) for offset in departure_offsets[period]],
+            }
+    return {"format": "mrt-timetable-trips", "version": 1, "routes": routes, "trips": trips}
+
+
+def build_departure_index(plans: Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[int]]]],
+                          line: Line = None) -> dict:
+    """Next-departure index of a schedule plan.
+
+    Returns {"stations": {station: {direction: {"times": [...], "trains": [...]}}}}
+    where times are the shown times in seconds since midnight, sorted
+    ascending, and trains holds the matching train IDs. timetable_query.py
+    answers "next train" queries on it with bisect.
+    """
+    line = line or default_line()
+    stations = {station: {} for station in line.station_names}
+    for direction, (departures, offsets_by_period) in plans.items():
+        ids = [train_id(direction, dep, period, line) for dep, period in departures]
+        for i, station in enumerate(line.station_names):
+            entries = sorted(
+                ((dep + offsets_by_period[period][i]) % SECONDS_PER_DAY, tid)
+                for (dep, period), tid in zip(departures, ids)
+            )
+            stations[station][direction] = {
+                "times": [t for t, _ in entries],
+                "trains": [tid for _, tid in entries],
+            }
+    return {"format": "mrt-timetable-index", "version": 1, "stations": stations}
+
+
+def write_schedule_outputs(output_file: str, plans, complete_timetable: Dict[str, Dict[str, List[str]]],
+                           formats=("json",), line: Line = None) -> Dict[str, str]:
+    """Write a schedule in every requested format; returns {format: path}."""
+    with metrics.stage("json_write"):
+        return _write_formats(output_file, plans, complete_timetable, formats, line or default_line())
+
+
+def _write_formats(output_file: str, plans, complete_timetable, formats, line: Line) -> Dict[str, str]:
+    paths = output_paths(output_file, formats)
+    for fmt, path in paths.items():
+        if fmt == "json":
+            write_timetable(path, complete_timetable)
+        elif fmt == "min":
+            _write_if_changed(path, json.dumps(complete_timetable, separators=(',', ':')).encode('utf-8'))
+        elif fmt == "compact":
+            _write_if_changed(path, json.dumps(encode_compact(plans, line), separators=(',', ':')).encode('utf-8'))
+        elif fmt == "bin":
+            _write_if_changed(path, encode_binary(plans, line))
+        elif fmt == "trips":
+            _write_if_changed(path, json.dumps(build_trips(plans, line), separators=(',', ':')).encode('utf-8'))
+        elif fmt == "index":
+            _write_if_changed(path, json.dumps(build_departure_index(plans, line), separators=(',', ':')).encode('utf-8'))
+    return paths
+
+
+def format_size_report(output_files: List[str], formats) -> List[str]:
+    """Compare on-disk (and gzip) sizes of every format for each schedule."""
+    lines = [f"{'File':<28} {'Bytes':>8} {'gzip':>8} {'vs JSON':>8}"]
+    for output_file in output_files:
+        json_size = None
+        for fmt, path in output_paths(output_file, formats).items():
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            if json_size is None:
+                json_size = len(data) if fmt == "json" else None
+            ratio = f"{len(data) / json_size:7.1%}" if json_size else "      —"
+            lines.append(f"{os.path.basename(path):<28} {len(data):>8} {len(gzip.compress(data, 9)):>8} {ratio:>8}")
+    return lines
+
+
+# ── Fleet circulation ──
+# Links each train arriving at a terminal to a later departure from that
+# terminal, at least the line's minimum turnaround after it arrives. Trips
+# are swept in departure order; each terminal keeps a heap of trainsets by
+# the time they are ready to leave, so matching is O(n log n). A departure
+# with no ready trainset takes a new one from the depot, and the number of
+# trainsets taken is the fleet the schedule needs.
+
+
+def plan_circulation(plans: Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[int]]]], line: Line = None,
+                     min_turnaround: int = None) -> dict:
+    """Assign every trip of a schedule plan (see plan_schedule) to a trainset.
+
+    Returns {"trainsets": fleet needed, "peak_in_service": most trains running
+    at once, "peak_time": when (seconds since midnight), "assignments":
+    [(direction, departure, period_type, trainset)] in departure order}.
+    Trainsets are numbered from 1 in the order they first leave the depot.
+    """
+    line = line or default_line()
+    turnaround = line.min_turnaround if min_turnaround is None else min_turnaround
+    trips = []
+    for direction, (departures, offsets_by_period) in plans.items():
+        route = line.journey_tables[direction]
+        origin, terminal = route[0][0], route[-1][0]
+        terminal_index = line.station_index[terminal]
+        for dep, period in departures:
+            # Unwrapped arrival, so a trip running past midnight still ends after it starts
+            trips.append((dep, dep + offsets_by_period[period][terminal_index], origin, terminal, direction, period))
+    trips.sort()
+
+    ready: Dict[str, List[Tuple[int, int]]] = {}   # terminal → heap of (ready time, trainset)
+    assignments = []
+    trainsets = 0
+    for dep, arrival, origin, terminal, direction, period in trips:
+        waiting = ready.get(origin)
+        if waiting and waiting[0][0] <= dep:
+            _, unit = heapq.heappop(waiting)
         else:
-            headway_display = f"{headway_sec // 60}:{headway_sec % 60:02d}"
-        print(f"  Slot {i}: {start_time} to {end_time}, headway {headway_display} → {len(trains)} trains")
-    
-    # Remove duplicates (keep first period_type) and sort
-    seen = {}
-    for t, p in all_trains_uttara:
-        if t not in seen:
-            seen[t] = p
-    all_trains_uttara = sorted(seen.items())
-    print(f"✓ Total trains towards Uttara North: {len(all_trains_uttara)}")
-    
-    # Pre-compute station offsets for each period type
+            trainsets += 1
+            unit = trainsets
+        heapq.heappush(ready.setdefault(terminal, []), (arrival + turnaround, unit))
+        assignments.append((direction, dep, period, unit))
+
+    # Trains running at once peak at a departure: departures so far minus arrivals
+    # up to and including that moment (trips are already in departure order)
+    arrivals = sorted(trip[1] for trip in trips)
+    arrived = peak = 0
+    peak_time = None
+    for started, trip in enumerate(trips, 1):
+        dep = trip[0]
+        while arrived < len(arrivals) and arrivals[arrived] <= dep:
+            arrived += 1
+        if started - arrived > peak:
+            peak, peak_time = started - arrived, dep
+    return {"trainsets": trainsets, "peak_in_service": peak, "peak_time": peak_time, "assignments": assignments}
+
+
+def fleet_shortfalls(circulation: dict, slots_by_direction: Dict[str, List[tuple]],
+                     fleet_size: int) -> List[Tuple[str, int, tuple, int]]:
+    """Slots with departures that need a trainset beyond the fleet.
+
+    Returns (direction, slot_number, slot, departures_short) for each such
+    slot; a departure belongs to the first slot that generated it, as in
+    collect_departures.
+    """
+    slot_of: Dict[str, Dict[int, Tuple[int, tuple]]] = {}
+    for direction, slots in slots_by_direction.items():
+        slot_of[direction] = {}
+        for i, slot, trains, _ in iter_slot_departures(slots):
+            for t in trains:
+                slot_of[direction].setdefault(t, (i, slot))
+
+    short: Dict[Tuple[str, int], list] = {}
+    for direction, dep, _, unit in circulation["assignments"]:
+        if unit > fleet_size:
+            i, slot = slot_of[direction][dep]
+            entry = short.setdefault((direction, i), [direction, i, slot, 0])
+            entry[3] += 1
+    return [tuple(entry) for entry in short.values()]
+
+
+def format_circulation_report(schedule_name: str, circulation: dict, shortfalls: list, fleet_size: int) -> List[str]:
+    """Console lines for one schedule's circulation check."""
+    peak_time = format_seconds(circulation["peak_time"]) if circulation["peak_time"] is not None else "—"
+    mark = "❌" if shortfalls else "✓"
+    lines = [f"{mark} {schedule_name}: {circulation['trainsets']} trainset(s) needed of {fleet_size}, "
+             f"peak {circulation['peak_in_service']} in service at {peak_time}"]
+    for direction, i, (start_time, end_time, headway, _), count in shortfalls:
+        lines.append(f"  ⚠ towards {direction}, slot {i} ({start_time} | {end_time} | {headway_display(headway)}): "
+                     f"{count} departure(s) need more trainsets than the fleet has")
+    return lines
+
+
+def check_circulation(config_path: str = "timetable-config.md", lines: List[Line] = (),
+                      fleet_size: int = None, min_turnaround: int = None) -> bool:
+    """Run the circulation stage for every schedule of every line and print a report.
+
+    fleet_size and min_turnaround override each line's own values.
+    Returns True if every schedule can be run with the available fleet.
+    """
+    feasible = True
+    for line, line_config in network(config_path, lines):
+        fleet = line.fleet_size if fleet_size is None else fleet_size
+        turnaround = line.min_turnaround if min_turnaround is None else min_turnaround
+        print(f"\n{line.name}: fleet {fleet}, minimum turnaround {format_duration(turnaround)}")
+        for (output_file, schedule_name), first_slots, second_slots in read_config_file(line_config, line).values():
+            plans = plan_schedule(first_slots, second_slots, quiet, line)
+            circulation = plan_circulation(plans, line, turnaround)
+            shortfalls = fleet_shortfalls(circulation, dict(zip(line.directions, (first_slots, second_slots))), fleet)
+            for report_line in format_circulation_report(schedule_name, circulation, shortfalls, fleet):
+                print(report_line)
+            feasible = feasible and not shortfalls
+    return feasible
+
+
+# ── Incremental build cache ──
+# .timetable-cache/manifest.json records, per schedule, a hash of everything
+# that feeds it (parsed slots, journey/dwell tables, headways, generator
+# source, output formats) and a hash of every file it produced. Schedules
+# whose inputs and outputs are unchanged are skipped.
+
+CACHE_DIR = ".timetable-cache"
+CACHE_VERSION = 3
+
+
+@lru_cache(maxsize=1)
+def _generator_source_digest() -> str:
+    """Hash of this module's source, so code changes invalidate the cache."""
+    try:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def schedule_inputs_digest(output_file: str, slots_motijheel: List[tuple], slots_uttara: List[tuple],
+                           formats=("json",), line: Line = None) -> str:
+    """Content hash of every input that determines one schedule's output files."""
+    line = line or default_line()
+    payload = {
+        "version": CACHE_VERSION,
+        "source": _generator_source_digest(),
+        "output_file": output_file,
+        "formats": sorted(formats),
+        "slots": dict(zip(line.directions, (slots_motijheel, slots_uttara))),
+        "journey_times": line.journey_tables,
+        "dwell_table": line.dwell_table(),
+        "direction_codes": line.direction_codes,
+        "headways": [RUSH_HEADWAY, OFFPEAK_HEADWAY],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's bytes, or None if it does not exist."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def load_build_cache(cache_dir: str = CACHE_DIR) -> Dict[str, dict]:
+    """Load the cache manifest; a missing or unreadable manifest is an empty cache."""
+    try:
+        with open(os.path.join(cache_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != CACHE_VERSION:
+        return {}
+    return manifest.get("schedules", {})
+
+
+def save_build_cache(entries: Dict[str, dict], cache_dir: str = CACHE_DIR):
+    """Write the cache manifest."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, "manifest.json"), 'w') as f:
+        json.dump({"version": CACHE_VERSION, "schedules": entries}, f, indent=2, sort_keys=True)
+
+
+def cache_entry(inputs_digest: str, output_paths_by_format: Dict[str, str]) -> dict:
+    """Cache manifest entry for a freshly written schedule."""
+    return {
+        "inputs": inputs_digest,
+        "outputs": {path: file_digest(path) for path in output_paths_by_format.values()},
+    }
+
+
+def is_cache_fresh(entry: dict, inputs_digest: str) -> bool:
+    """True if a cache entry matches the current inputs and its output files are untouched."""
+    return (
+        bool(entry)
+        and entry.get("inputs") == inputs_digest
+        and all(file_digest(path) == digest for path, digest in entry.get("outputs", {}).items())
+    )
+
+
+def _print_saved(paths: Dict[str, str]):
+    for path in paths.values():
+        print(f"✓ Saved to {path}")
+
+
+def generate_schedule(schedule_name: str, output_file: str, slots_motijheel: List[tuple], slots_uttara: List[tuple],
+                      formats=("json",), line: Line = None) -> Dict[str, str]:
+    """Generate timetable for a single schedule; returns {format: path} of the files written"""
+    _print_schedule_header(schedule_name)
+
+    plans = plan_schedule(slots_motijheel, slots_uttara, print, line)
     print("\nCalculating station times (journey + dwell offsets)...")
-    offsets_by_period = {}
-    for period in ("rush", "offpeak", "custom"):
-        offsets_motijheel = compute_station_offsets(JOURNEY_TIMES_TO_MOTIJHEEL, period, "Motijheel")
-        offsets_uttara    = compute_station_offsets(JOURNEY_TIMES_TO_UTTARA, period, "Uttara North")
-        offsets_by_period[period] = (offsets_motijheel, offsets_uttara)
-    
-    # Station name list (consistent order)
-    station_names = [s for s, _ in JOURNEY_TIMES_TO_MOTIJHEEL]
-    
-    # Origin and terminal stations for each direction
-    origin_motijheel   = JOURNEY_TIMES_TO_MOTIJHEEL[0][0]    # "Uttara North"
-    terminal_motijheel = JOURNEY_TIMES_TO_MOTIJHEEL[-1][0]    # "Motijheel"
-    origin_uttara      = JOURNEY_TIMES_TO_UTTARA[0][0]        # "Motijheel"
-    terminal_uttara    = JOURNEY_TIMES_TO_UTTARA[-1][0]        # "Uttara North"
-    
-    # Stations where travel times are unverified — show arrival time only
-    ARRIVAL_ONLY_STATIONS = NO_DWELL_STATIONS
-    
-    # Build the complete timetable structure
-    # Times shown are DEPARTURE times (arrival + dwell) except at terminal
-    # stations and unverified stations which show arrival times.
-    complete_timetable = {}
-    
-    for station in station_names:
-        complete_timetable[station] = {}
-        
-        # Calculate times for this station — Motijheel direction
-        times_to_motijheel = []
-        for dep_time, period_type in all_trains_motijheel:
-            offset = offsets_by_period[period_type][0][station]
-            dt = parse_time(dep_time)
-            arrival = dt + timedelta(seconds=offset)
-            # Add dwell time for departure, except at origin, terminal, and unverified stations
-            if station not in (origin_motijheel, terminal_motijheel) and station not in ARRIVAL_ONLY_STATIONS:
-                dwell = get_wait_time(station, period_type, "Motijheel")
-                arrival += timedelta(seconds=dwell)
-            times_to_motijheel.append(format_time(arrival))
-        complete_timetable[station]["Motijheel"] = times_to_motijheel
-        
-        # Calculate times for this station — Uttara North direction
-        times_to_uttara = []
-        for dep_time, period_type in all_trains_uttara:
-            offset = offsets_by_period[period_type][1][station]
-            dt = parse_time(dep_time)
-            arrival = dt + timedelta(seconds=offset)
-            # Add dwell time for departure, except at origin, terminal, and unverified stations
-            if station not in (origin_uttara, terminal_uttara) and station not in ARRIVAL_ONLY_STATIONS:
-                dwell = get_wait_time(station, period_type, "Uttara North")
-                arrival += timedelta(seconds=dwell)
-            times_to_uttara.append(format_time(arrival))
-        complete_timetable[station]["Uttara North"] = times_to_uttara
-    
-    # Save to JSON file
-    with open(output_file, 'w') as f:
-        json.dump(complete_timetable, f, indent=2)
-    
-    print(f"✓ Saved to {output_file}")
+    columns = {direction: build_station_times(*plan) for direction, plan in plans.items()}
+
+    # Save to JSON file (and any compact formats)
+    paths = write_schedule_outputs(output_file, plans, assemble_timetable(columns, line), formats, line)
+
+    _print_saved(paths)
+    return paths
+
+
+# ── Shared-state worker pools ──
+# Pools for running many small tasks against one large object (a delay model,
+# an optimizer problem). The object is sent to each worker once, through the
+# pool initializer, so tasks carry only their own arguments.
+
+_shared_state = None
+
+
+def _init_shared_worker(state):
+    global _shared_state
+    _shared_state = state
+    metrics.enabled = False
+
+
+def _call_shared(method: str, item):
+    return getattr(_shared_state, method)(item)
+
+
+def shared_pool(jobs: int, state) -> ProcessPoolExecutor:
+    """A process pool of jobs workers, each holding its own copy of state (metrics off)."""
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_shared_worker, initargs=(state,))
+
+
+def map_shared(pool: ProcessPoolExecutor, method: str, items: list, jobs: int) -> list:
+    """[state.method(item) for item in items] on a shared_pool, in input order."""
+    return list(pool.map(partial(_call_shared, method), items, chunksize=max(1, len(items) // (jobs * 4))))
+
 
+def _build_direction_job(job: Tuple[Line, str, List[tuple]]):
+    """Process-pool worker: plan and build one schedule×direction unit, capturing its log lines and metrics."""
+    line, direction, slots = job
+    metrics.reset()
+    lines: List[str] = []
+    plan = plan_direction(direction, slots, lines.append, line)
+    columns = build_station_times(*plan)
+    return lines, plan, columns, metrics.snapshot()
 
-def generate_full_timetable(config_path: str = "timetable-config.md"):
-    """Generate complete timetables for all schedules"""
+
+def generate_schedules_parallel(all_schedules: Dict[str, Tuple[Line, Tuple[str, str], List[tuple], List[tuple]]],
+                                jobs: int, formats=("json",)) -> Dict[str, Dict[str, str]]:
+    """Generate all schedules with their directions fanned out over one process pool.
+
+    all_schedules maps cache keys to (line, (output_file, schedule_name),
+    first_slots, second_slots), so every line of the network shares the pool.
+    Results are merged in config order, so files and console output match
+    a serial run exactly; worker stage times are summed into metrics.
+    Returns {schedule_key: {format: path}}.
+    """
+    units = [
+        (line, direction, slots)
+        for line, _, first_slots, second_slots in all_schedules.values()
+        for direction, slots in zip(line.directions, (first_slots, second_slots))
+    ]
+    written = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = iter(pool.map(_build_direction_job, units))
+
+        for key, (line, (output_file, schedule_name), _, _) in all_schedules.items():
+            _print_schedule_header(schedule_name)
+            plans, columns = {}, {}
+            for direction in line.directions:
+                lines, plans[direction], columns[direction], worker_metrics = next(results)
+                metrics.merge(worker_metrics)
+                for log_line in lines:
+                    print(log_line)
+            print("\nCalculating station times (journey + dwell offsets)...")
+            written[key] = write_schedule_outputs(output_file, plans, assemble_timetable(columns, line), formats, line)
+            _print_saved(written[key])
+    return written
+
+
+def schedule_cache_key(line: Line, schedule_key: str) -> str:
+    """Build-cache key of one schedule of one line, e.g. "MRT-6/weekdays"."""
+    return f"{line.name}/{schedule_key}"
+
+
+def generate_full_timetable(config_path: str = "timetable-config.md", jobs: int = 1,
+                            force: bool = False, cache_dir: str = CACHE_DIR, formats=("json",),
+                            lines: List[Line] = ()):
+    """Generate complete timetables for all schedules.
+
+    config_path is the MRT-6 config; lines adds further lines (see load_line),
+    each read from its own config and generated in the same pass.
+    jobs > 1 builds the schedule×direction units of every line in one process pool.
+    Only schedules whose inputs changed since the last run are regenerated,
+    unless force is set. formats selects extra outputs (see OUTPUT_FORMATS);
+    when any are requested a size report is printed.
+    """
+    line_configs = network(config_path, lines)
     print("=" * 60)
-    print("Dhaka MRT-6 Timetable Generator")
+    if lines:
+        print(f"Dhaka Metro Timetable Generator ({', '.join(line.name for line, _ in line_configs)})")
+    else:
+        print("Dhaka MRT-6 Timetable Generator")
     print("=" * 60)
     
-    # Read configuration from file
-    print("\nReading configuration from timetable-config.md...")
-    try:
-        all_schedules = read_config_file(config_path)
-    except Exception as e:
-        print(f"\n❌ Error reading config file: {e}")
-        return
-    
-    if not all_schedules:
-        print("\n❌ No schedules found in config file!")
-        return
-    
-    print(f"✓ Configuration loaded successfully")
-    print(f"✓ Found {len(all_schedules)} schedule(s): {', '.join(all_schedules.keys())}")
+    # Read configuration from file(s)
+    all_schedules = {}
+    for line, line_config in line_configs:
+        print(f"\nReading configuration from {line_config}...")
+        try:
+            schedules = read_config_file(line_config, line)
+        except Exception as e:
+            print(f"\n❌ Error reading config file: {e}")
+            return
+        
+        if not schedules:
+            print(f"\n❌ No schedules found in config file!")
+            return
+        
+        print(f"✓ Configuration loaded successfully")
+        print(f"✓ Found {len(schedules)} schedule(s): {', '.join(schedules.keys())}")
+        for key, (outputs, first_slots, second_slots) in schedules.items():
+            all_schedules[schedule_cache_key(line, key)] = (line, outputs, first_slots, second_slots)
     
+    # Skip schedules whose inputs and output are unchanged since the last run
+    with metrics.stage("cache_check"):
+        cache = load_build_cache(cache_dir)
+        digests = {
+            key: schedule_inputs_digest(output_file, first_slots, second_slots, formats, line)
+            for key, (line, (output_file, _), first_slots, second_slots) in all_schedules.items()
+        }
+        stale = {}
+        for key, schedule in all_schedules.items():
+            _, (output_file, schedule_name), _, _ = schedule
+            if not force and is_cache_fresh(cache.get(key), digests[key]):
+                print(f"↷ {schedule_name} unchanged — keeping {output_file}")
+            else:
+                stale[key] = schedule
+    metrics.count("schedules_cached", len(all_schedules) - len(stale))
+    metrics.count("schedules_generated", len(stale))
+
     # Generate each schedule
-    for schedule_key, ((output_file, schedule_name), slots_motijheel, slots_uttara) in all_schedules.items():
-        generate_schedule(schedule_name, output_file, slots_motijheel, slots_uttara)
+    if jobs > 1 and stale:
+        written = generate_schedules_parallel(stale, jobs, formats)
+    else:
+        written = {}
+        for key, (line, (output_file, schedule_name), first_slots, second_slots) in stale.items():
+            written[key] = generate_schedule(schedule_name, output_file, first_slots, second_slots, formats, line)
+
+    with metrics.stage("cache_check"):
+        for key, paths in written.items():
+            cache[key] = cache_entry(digests[key], paths)
+        save_build_cache(cache, cache_dir)
     
-    # Summary
+    # Summary: regenerated schedules, then those kept from the build cache
+    cached = [schedule for key, schedule in all_schedules.items() if key not in stale]
     print("\n" + "=" * 60)
-    print("ALL TIMETABLES GENERATED SUCCESSFULLY!")
+    print("ALL TIMETABLES GENERATED SUCCESSFULLY!" if stale else "ALL TIMETABLES UP TO DATE!")
     print("=" * 60)
-    print(f"✓ {len(all_schedules)} schedule(s) generated:")
-    for schedule_key, ((output_file, schedule_name), _, _) in all_schedules.items():
-        print(f"  • {schedule_name} → {output_file}")
+    if stale:
+        print(f"✓ {len(stale)} schedule(s) generated:")
+        for _, (output_file, schedule_name), _, _ in stale.values():
+            print(f"  • {schedule_name} → {output_file}")
+    if cached:
+        print(f"↷ {len(cached)} schedule(s) unchanged, kept from {cache_dir}/ (use --force to regenerate):")
+        for _, (output_file, schedule_name), _, _ in cached:
+            print(f"  • {schedule_name} → {output_file}")
     print("=" * 60)
 
+    if tuple(formats) != ("json",):
+        print("\nOutput size report:")
+        for report_line in format_size_report([output_file for _, (output_file, _), _, _ in all_schedules.values()], formats):
+            print(f"  {report_line}")
+
+
+# ── Watch mode ──
+
+WATCH_INTERVAL = 0.05   # seconds between config polls
+
+
+def _file_signature(path: str):
+    """(mtime_ns, size) of a file, or None while it is missing (e.g. mid-save)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def format_slot_diff(direction: str, old_slots: List[tuple], new_slots: List[tuple]) -> List[str]:
+    """Describe how many trains each slot added or removed between two slot lists.
+
+    Slots are matched by (start, end, headway); unmatched slots count as
+    entirely added or removed.
+    """
+    def counts(slots):
+        result = {}
+        for slot, count in zip(slots, slot_train_counts(slots)):
+            key = slot[:3]
+            result[key] = result.get(key, 0) + count
+        return result
+
+    old_counts, new_counts = counts(old_slots), counts(new_slots)
+    lines = []
+    for key in list(new_counts) + [k for k in old_counts if k not in new_counts]:
+        before, after = old_counts.get(key, 0), new_counts.get(key, 0)
+        if before == after:
+            continue
+        start_time, end_time, headway = key
+        if key not in old_counts:
+            note = " (new slot)"
+        elif key not in new_counts:
+            note = " (slot removed)"
+        else:
+            note = ""
+        lines.append(f"  {direction}: {start_time} | {end_time} | {headway_display(headway)}"
+                     f"  {after - before:+d} train(s){note}")
+    return lines
+
+
+def watch_config(config_path: str = "timetable-config.md", interval: float = WATCH_INTERVAL,
+                 cache_dir: str = CACHE_DIR, formats=("json",)):
+    """Regenerate timetables whenever the config file changes.
+
+    Polls the config file; after an edit only the schedules whose parsed
+    slots changed are rebuilt and rewritten, and a per-slot train diff is
+    printed. Runs until interrupted.
+    """
+    generate_full_timetable(config_path, cache_dir=cache_dir, formats=formats)
+    previous = read_config_file(config_path)
+    signature = _file_signature(config_path)
+    print(f"\n👀 Watching {config_path} for changes (Ctrl+C to stop)...")
+
+    while True:
+        time.sleep(interval)
+        current_signature = _file_signature(config_path)
+        if current_signature is None or current_signature == signature:
+            continue
+        signature = current_signature
+        started = time.perf_counter()
+
+        try:
+            current = read_config_file(config_path)
+        except Exception as e:
+            print(f"❌ Error reading config file: {e}")
+            continue
+
+        changed = [key for key, schedule in current.items() if previous.get(key) != schedule]
+        cache = load_build_cache(cache_dir)
+        line = default_line()
+        report = []
+        for key in changed:
+            (output_file, schedule_name), slots_motijheel, slots_uttara = current[key]
+            plans = plan_schedule(slots_motijheel, slots_uttara, quiet)
+            columns = {direction: build_station_times(*plan) for direction, plan in plans.items()}
+            paths = write_schedule_outputs(output_file, plans, assemble_timetable(columns), formats)
+            cache[schedule_cache_key(line, key)] = cache_entry(
+                schedule_inputs_digest(output_file, slots_motijheel, slots_uttara, formats), paths)
+            old_slots = previous[key][1:] if key in previous else ([], [])
+            report.append(f"✓ {schedule_name} → {output_file}")
+            for direction, old, new in zip(line.directions, old_slots, current[key][1:]):
+                report.extend(format_slot_diff(direction, old, new))
+        if changed:
+            save_build_cache(cache, cache_dir)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stamp = datetime.now().strftime("%H:%M:%S")
+        for key in previous:
+            if key not in current:
+                print(f"[{stamp}] ⚠ {key} section missing — keeping {previous[key][0][0]}")
+        if changed:
+            print(f"[{stamp}] Regenerated {len(changed)} schedule(s) in {elapsed_ms:.0f} ms")
+            for line in report:
+                print(line)
+        else:
+            print(f"[{stamp}] No schedule changes")
+        previous = current
+
+
+def write_metrics(path: str, total_seconds: float, **context):
+    """Write the current metrics as JSON."""
+    snapshot = metrics.snapshot()
+    data = {
+        "version": 1,
+        **context,
+        "total_seconds": total_seconds,
+        "stages": {
+            name: {"seconds": seconds, "calls": snapshot["calls"].get(name, 0)}
+            for name, seconds in snapshot["stages"].items()
+        },
+        "counters": snapshot["counters"],
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv: List[str] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Dhaka MRT-6 Timetable Generator")
+    parser.add_argument("--config", default="timetable-config.md",
+                        help="timetable configuration file (default: timetable-config.md)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="build schedule×direction units in N worker processes (0 = one per CPU)")
+    parser.add_argument("--dwell-table", nargs="?", const="-", metavar="PATH",
+                        help="print the fully resolved dwell matrix, or write it as JSON to PATH, and exit")
+    parser.add_argument("--validate-dwell", action="store_true",
+                        help="check DWELL_OVERRIDES against the journey tables and exit")
+    parser.add_argument("--check", action="store_true",
+                        help="check the config and the generated timetables for consistency and exit "
+                             "(non-zero on errors)")
+    parser.add_argument("--line", action="append", default=[], metavar="PATH", dest="lines",
+                        help="also generate the line defined in this JSON data file (repeatable)")
+    parser.add_argument("--circulation", action="store_true",
+                        help="pair terminal arrivals with departures, report the trainsets each schedule needs "
+                             "and flag slots the fleet cannot run, then exit")
+    parser.add_argument("--fleet", type=int, metavar="N",
+                        help=f"trainsets available for --circulation (default: the line's, {FLEET_SIZE} for MRT-6)")
+    parser.add_argument("--turnaround", metavar="M:SS",
+                        help="minimum terminal turnaround for --circulation (default: the line's, "
+                             f"{format_duration(MIN_TURNAROUND)} for MRT-6)")
+    parser.add_argument("--delay-sweep", metavar="M:SS",
+                        help="hold each train at its origin for M:SS in turn and report how far the delay "
+                             "spreads to other trains, then exit; uses --jobs worker processes")
+    parser.add_argument("--optimize", metavar="DEMAND",
+                        help="search slot headways against an hourly demand profile (JSON) and print "
+                             "a ready-to-paste slots block; uses --jobs worker processes")
+    parser.add_argument("--stream", metavar="PATH",
+                        help="stream every trip from --start over --days to JSON Lines (or CSV if PATH ends in .csv)")
+    parser.add_argument("--start", metavar="YYYY-MM-DD",
+                        help="first service day for --stream (default: today)")
+    parser.add_argument("--days", type=int, default=7, metavar="N",
+                        help="number of service days for --stream (default: 7)")
+    parser.add_argument("--holidays", metavar="PATH",
+                        help="holiday/exception calendar (JSON) for --stream and --calendar; holidays "
+                             "other than Fridays run the Saturday schedule")
+    parser.add_argument("--calendar", type=int, metavar="YEAR",
+                        help="compile the schedule of every date of YEAR, with --holidays, into "
+                             "docs/service-calendar.json and exit")
+    parser.add_argument("--verified", nargs="?", const="docs/verified-times.json", metavar="PATH",
+                        help="reconcile community-verified times (default: docs/verified-times.json) with the "
+                             "timetables the config generates, report coverage and exit")
+    parser.add_argument("--baseline", nargs="+", metavar="FILE",
+                        help="previous timetable files to remap --verified entries from, named like the "
+                             "schedules' outputs (default: the docs/mrt-6*.json files on disk)")
+    parser.add_argument("--update-verified", action="store_true",
+                        help="with --verified, move verifications whose train shifted to its new time")
+    parser.add_argument("--diff", metavar="REVISION",
+                        help="summarize how the schedules of --config differ from an older revision "
+                             "(a config file, or a git revision such as HEAD or main~3) and exit")
+    parser.add_argument("--diff-line", metavar="PATH",
+                        help="line data file (see --export-line) with the old revision's run times and "
+                             "dwell rules, for --diff")
+    parser.add_argument("--export-line", metavar="PATH",
+                        help="write the built-in MRT-6 line as a JSON data file (a template for --line) and exit")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and regenerate changed schedules whenever the config file is saved")
+    parser.add_argument("--formats", default="json", metavar="LIST",
+                        help="comma-separated outputs: json, min, compact, bin, trips, index, or all (default: json)")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve /next, /trip/{id} and /station/{name} over HTTP from schedules held in memory")
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port for --serve (default: 8765)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PATH",
+                        help="run under cProfile and print stage timings and the hottest functions; "
+                             "optionally save raw pstats data to PATH")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write stage timings and counters as JSON to PATH (for CI trending)")
+    parser.add_argument("--force", action="store_true",
+                        help=f"regenerate every schedule, ignoring the {CACHE_DIR}/ build cache")
+    args = parser.parse_args(argv)
+
+    if args.validate_dwell:
+        problems = validate_dwell_overrides()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            print(f"\n{len(problems)} problem(s) found in dwell configuration")
+            return 1
+        print(f"✓ {len(DWELL_OVERRIDES)} dwell override(s) valid")
+        return 0
+
+    if args.dwell_table:
+        if args.dwell_table == "-":
+            print(format_dwell_table())
+        else:
+            export_dwell_table(args.dwell_table)
+            print(f"✓ Dwell table saved to {args.dwell_table}")
+        return 0
+
+    if args.export_line:
+        export_line(args.export_line)
+        print(f"✓ Line definition saved to {args.export_line}")
+        return 0
+
+    try:
+        lines = [load_line(path) for path in args.lines]
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.check:
+        from timetable_check import run_check
+        try:
+            return 0 if run_check(args.config, lines) else 1
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+
+    if args.diff:
+        from timetable_diff import run_diff
+        try:
+            return 0 if run_diff(args.diff, args.config, args.diff_line) else 1
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+
+    if args.verified:
+        from timetable_verified import run_reconcile
+        try:
+            return 0 if run_reconcile(args.verified, args.config, args.baseline, args.update_verified) else 1
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+
+    if args.stream:
+        from timetable_calendar import load_overrides
+        from timetable_stream import run_stream
+        try:
+            start = datetime.strptime(args.start, "%Y-%m-%d").date() if args.start else datetime.now().date()
+        except ValueError:
+            parser.error(f"invalid --start '{args.start}' (expected YYYY-MM-DD)")
+        started = time.perf_counter()
+        try:
+            overrides = load_overrides(args.holidays) if args.holidays else None
+            count = run_stream(args.stream, start, args.days, args.config, lines, overrides)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✓ Streamed {count:,} trips over {args.days} day(s) to {args.stream} "
+              f"in {time.perf_counter() - started:.2f} s")
+        return 0
+
+    if args.calendar:
+        from timetable_calendar import run_calendar
+        try:
+            return 0 if run_calendar(args.calendar, args.holidays, args.config) else 1
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+
+    if args.optimize:
+        from timetable_optimizer import run_optimizer
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        try:
+            return 0 if run_optimizer(args.optimize, jobs, lines[0] if lines else None) else 1
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+
+    if args.delay_sweep:
+        from timetable_delay import run_delay_sweep
+        try:
+            delay = parse_duration(args.delay_sweep)
+        except (ValueError, IndexError):
+            parser.error(f"invalid --delay-sweep '{args.delay_sweep}' (expected M:SS)")
+        run_delay_sweep(delay, args.config, lines, args.jobs if args.jobs > 0 else (os.cpu_count() or 1))
+        return 0
+
+    if args.circulation:
+        try:
+            turnaround = parse_duration(args.turnaround) if args.turnaround else None
+        except (ValueError, IndexError):
+            parser.error(f"invalid --turnaround '{args.turnaround}' (expected M:SS)")
+        return 0 if check_circulation(args.config, lines, args.fleet, turnaround) else 1
+
+    formats = OUTPUT_FORMATS if args.formats == "all" else tuple(f.strip() for f in args.formats.split(",") if f.strip())
+    unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)} (choose from {', '.join(OUTPUT_FORMATS)} or all)")
+    # The station-major JSON is what the site reads, so it is always written first
+    formats = ("json",) + tuple(f for f in dict.fromkeys(formats) if f != "json")
+
+    if args.serve:
+        from timetable_service import serve
+        serve(args.config, args.host, args.port)
+        return 0
+
+    if args.watch:
+        watch_config(args.config, formats=formats)
+        return 0
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    metrics.reset()
+    profiler = cProfile.Profile() if args.profile is not None else None
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    generate_full_timetable(args.config, jobs=jobs, force=args.force, formats=formats, lines=lines)
+    if profiler:
+        profiler.disable()
+    elapsed = time.perf_counter() - started
+
+    if profiler:
+        print(f"\nStage timings ({elapsed * 1000:.1f} ms total):")
+        for line in metrics.report_lines():
+            print(f"  {line}")
+        print()
+        stats = pstats.Stats(profiler).strip_dirs().sort_stats("cumulative")
+        stats.print_stats(25)
+        if args.profile:
+            stats.dump_stats(args.profile)
+            print(f"✓ Profile data saved to {args.profile}")
+
+    if args.metrics:
+        write_metrics(args.metrics, elapsed, config_path=args.config, jobs=jobs)
+        print(f"✓ Metrics saved to {args.metrics}")
+    return 0
+
 
 if __name__ == "__main__":
     try:
-        generate_full_timetable()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user.")
     except Exception as e:
         print(f"\nError: {e}")
         import traceback
         traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,44 @@
+"""Tests for timetable_check: config diagnostics."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import generate_timetable as gt  # noqa: E402
+import timetable_check as tc  # noqa: E402
+
+CONFIG = """## WEEKDAYS Schedule
+```
+MOTIJHEEL_SLOTS:
+630 | 710 | 20:00
+2116 | 2116 | 1
+```
+```
+UTTARA_SLOTS:
+700 | 800 | 1
+```
+## FRIDAY Schedule
+MOTIJHEEL_SLOTS:
+700 | 800 | 10
+UTTARA_SLOTS:
+700 | 800 | 10
+## SATURDAY Schedule
+MOTIJHEEL_SLOTS:
+700 | 800 | 10
+UTTARA_SLOTS:
+700 | 800 | 10
+"""
+
+
+def _check(tmp_path, text):
+    path = tmp_path / "config.md"
+    path.write_text(text, encoding="utf-8")
+    sections, problems = gt.read_config_sections(str(path))
+    return tc.check_config(str(path), sections, problems)
+
+
+def test_single_train_slot_skips_headway_check(tmp_path):
+    diagnostics = _check(tmp_path, CONFIG)
+    assert [(level, location.rsplit(":", 1)[1]) for level, location, _ in diagnostics] == [("error", "9")]
+    assert "headway 1:00 is below the minimum headway 2:30" in diagnostics[0][2]
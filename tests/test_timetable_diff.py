@@ -0,0 +1,39 @@
+"""Tests for timetable_diff: review summaries of schedule changes."""
+
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import generate_timetable as gt  # noqa: E402
+import timetable_diff as td  # noqa: E402
+
+CONFIG = os.path.join(ROOT, "timetable-config.md")
+
+
+def test_run_time_edit_reports_shifted_trains(tmp_path):
+    path = str(tmp_path / "line.json")
+    gt.export_line(path)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    station, duration = data["directions"][0]["journey_times"][5]
+    data["directions"][0]["journey_times"][5] = [station, gt.format_duration(gt.parse_duration(duration) + 120)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    schedules = gt.read_config_file(CONFIG)
+    old = td.Revision("old", gt.default_line(), schedules)
+    new = td.Revision("new", gt.load_line(path), schedules)
+    summary = td.diff_revisions(old, new)
+
+    assert f"    ~ {station}: +2:00 on 113 train(s)" in summary
+    assert "  Towards Uttara North: unchanged (115 trains)" in summary
+
+
+def test_identical_revisions_are_unchanged():
+    schedules = gt.read_config_file(CONFIG)
+    revision = td.Revision("same", gt.default_line(), schedules)
+    summary = td.diff_revisions(revision, revision)
+    assert all("unchanged" in line for line in summary if line.startswith("  Towards"))
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Service Calendar
+Precompiles which schedule runs on every date of a year, from a local
+holiday/exception file, so the site and local services no longer look up
+public holidays online at first paint.
+
+The compiled index (docs/service-calendar.json) stores one character per
+day. Each character is the base-36 position of that day's schedule in
+"schedules":
+
+    {"format": "mrt-service-calendar", "version": 1,
+     "start": "2026-01-01", "days": 365,
+     "schedules": ["weekdays", "friday", "saturday"],
+     "files": {"weekdays": "mrt-6.json", ...},
+     "codes": "0000120000012…",
+     "holidays": {"2026-02-21": "Shaheed Day", ...}}
+
+Resolving a date is one subtraction and one string index:
+schedules[int(codes[(date - start).days], 36)].
+
+Calendar file (JSON), either a list of holiday dates or an object:
+
+    {"holidays": {"2026-02-21": "Shaheed Day"} or ["2026-02-21", ...],
+     "exceptions": {"2026-03-26": "weekdays"}}
+
+Holidays run the Saturday schedule unless they fall on a Friday, as in
+getTrainTimesFileAsync in docs/script.js. Exceptions may name any schedule
+key and always win. An object of plain date → schedule key pairs is read
+as exceptions.
+
+Run via:  python3 generate_timetable.py --calendar 2026 --holidays holidays-2026.json
+"""
+
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import generate_timetable as gt
+
+CALENDAR_FORMAT = "mrt-service-calendar"
+CALENDAR_VERSION = 1
+CALENDAR_FILE = "docs/service-calendar.json"
+
+# Schedule run on public holidays other than Fridays
+HOLIDAY_SCHEDULE = "saturday"
+
+_CODE_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _check_date(day: str, path: str) -> str:
+    try:
+        date.fromisoformat(day)
+    except (TypeError, ValueError):
+        raise ValueError(f"{path}: invalid date {day!r} (expected YYYY-MM-DD)") from None
+    return day
+
+
+def load_calendar(path: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Read a holiday/exception file; returns (holiday names, exceptions) keyed by ISO date."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"holidays": data}
+    elif "holidays" not in data and "exceptions" not in data:
+        data = {"exceptions": data}
+
+    holidays = data.get("holidays", {})
+    if isinstance(holidays, list):
+        holidays = {day: "" for day in holidays}
+    holidays = {_check_date(day, path): name for day, name in holidays.items()}
+    exceptions = {_check_date(day, path): key for day, key in data.get("exceptions", {}).items()}
+    return holidays, exceptions
+
+
+def date_overrides(holidays: Dict[str, str], exceptions: Dict[str, str]) -> Dict[str, str]:
+    """Date → schedule key for schedule_for_date: non-Friday holidays, then exceptions."""
+    overrides = {day: HOLIDAY_SCHEDULE for day in holidays if date.fromisoformat(day).weekday() != 4}
+    overrides.update(exceptions)
+    return overrides
+
+
+def load_overrides(path: str) -> Dict[str, str]:
+    """Date overrides from a holiday/exception file, ready for schedule_for_date."""
+    return date_overrides(*load_calendar(path))
+
+
+def compile_calendar(start: date, days: int, overrides: Dict[str, str] = None,
+                     holidays: Dict[str, str] = None, files: Dict[str, str] = None) -> dict:
+    """Per-date schedule index for days dates from start (see the module docstring)."""
+    keys = [gt.schedule_for_date(start + timedelta(days=n), overrides) for n in range(days)]
+    schedules = list(dict.fromkeys(list(files or {}) + keys))
+    if len(schedules) > len(_CODE_DIGITS):
+        raise ValueError(f"at most {len(_CODE_DIGITS)} schedules fit in a calendar, got {len(schedules)}")
+    code = {key: _CODE_DIGITS[i] for i, key in enumerate(schedules)}
+    end = (start + timedelta(days=days)).isoformat()
+    return {
+        "format": CALENDAR_FORMAT,
+        "version": CALENDAR_VERSION,
+        "start": start.isoformat(),
+        "days": days,
+        "schedules": schedules,
+        "files": dict(files or {}),
+        "codes": "".join(code[key] for key in keys),
+        "holidays": {day: name for day, name in sorted((holidays or {}).items()) if start.isoformat() <= day < end},
+    }
+
+
+def resolve(calendar: dict, day: date) -> str:
+    """Schedule key of a date in O(1); dates outside the calendar use the day-of-week rule."""
+    offset = (day - date.fromisoformat(calendar["start"])).days
+    if 0 <= offset < calendar["days"]:
+        return calendar["schedules"][int(calendar["codes"][offset], 36)]
+    return gt.schedule_for_date(day)
+
+
+def load_compiled(path: str = CALENDAR_FILE) -> dict:
+    """Read a compiled calendar index."""
+    with open(path, 'r', encoding='utf-8') as f:
+        calendar = json.load(f)
+    if calendar.get("format") != CALENDAR_FORMAT or calendar.get("version") != CALENDAR_VERSION:
+        raise ValueError(f"{path} is not a version {CALENDAR_VERSION} service calendar")
+    return calendar
+
+
+def run_calendar(year: int, calendar_path: str = None, config_path: str = "timetable-config.md",
+                 output_path: str = CALENDAR_FILE) -> bool:
+    """Compile one year for the MRT-6 schedules in the config and write it; returns True on success."""
+    holidays, exceptions = load_calendar(calendar_path) if calendar_path else ({}, {})
+    schedules = gt.read_config_file(config_path)
+    files = {key: os.path.basename(output_file) for key, ((output_file, _), _, _) in schedules.items()}
+
+    start = date(year, 1, 1)
+    calendar = compile_calendar(start, (date(year + 1, 1, 1) - start).days,
+                                date_overrides(holidays, exceptions), holidays, files)
+    undefined = [key for key in calendar["schedules"] if key not in files]
+    for key in undefined:
+        count = calendar["codes"].count(_CODE_DIGITS[calendar["schedules"].index(key)])
+        print(f"❌ Schedule '{key}' is used on {count} day(s) but not defined in {config_path}")
+    if undefined:
+        return False
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(calendar, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    counts: List[str] = [f"{calendar['codes'].count(_CODE_DIGITS[i])} {key}"
+                         for i, key in enumerate(calendar["schedules"])]
+    print(f"✓ Service calendar {year} saved to {output_path}: {', '.join(counts)} "
+          f"({len(calendar['holidays'])} holiday(s), "
+          f"{sum(day.startswith(f'{year}-') for day in exceptions)} exception(s))")
+    return True
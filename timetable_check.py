@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Timetable Checker
+Fast consistency checks over the config and the generated timetables, for
+every save and as a pre-deploy gate.
+
+Config (the generator's one-pass tokenizer, with line numbers):
+    a section for every schedule, both slot blocks in each, every slot line
+    parsing (START | END | HEADWAY), headways of at least MIN_HEADWAY;
+    schedule sections beyond weekdays/friday/saturday are checked too
+
+Timetables (one pass over each station-major docs/*.json file):
+    exactly the line's stations and directions, the same number of trains
+    at every station of a direction, well-formed HH:MM:SS times, times
+    increasing along every trip and down every station column (a column or
+    trip may wrap past midnight once), no two trains closer than
+    MIN_HEADWAY; gaps below RUSH_HEADWAY are warnings
+
+Run via:  python3 generate_timetable.py --check
+"""
+
+import json
+import re
+import time
+from typing import Dict, List, Tuple
+
+import generate_timetable as gt
+
+# (level, location, message); level is "error" or "warning"
+Diagnostic = Tuple[str, str, str]
+
+# Consecutive times further apart than this (forwards, across midnight) are out of order
+WRAP_THRESHOLD = 12 * 3600
+
+# Diagnostics printed per file before the rest are only counted
+MAX_REPORTED = 20
+
+_TIME_RE = re.compile(r"([01]\d|2[0-3]):([0-5]\d):([0-5]\d)\Z")
+
+
+# ── Config ──
+
+def check_config(config_path: str, sections: Dict[str, gt.ConfigSection], problems: List[gt.ConfigProblem],
+                 line: gt.Line = None) -> List[Diagnostic]:
+    """Diagnostics for a config tokenized by gt.read_config_sections."""
+    line = line or gt.default_line()
+    numbered = [(p.line_no, p.level, p.message) for p in problems]
+    for section in sections.values():
+        for block in section.blocks.values():
+            for (start, end, headway, _), number in zip(block.slots, block.slot_lines):
+                # A slot with start == end is one train (e.g. "2116 | 2116 | 1"); its headway is unused
+                if start != end and gt.headway_seconds(headway) < line.min_headway:
+                    numbered.append((number, "error", f"headway {gt.format_duration(gt.headway_seconds(headway))} is below "
+                                                      f"the minimum headway {gt.format_duration(line.min_headway)}"))
+    diagnostics: List[Diagnostic] = [(level, f"{config_path}:{number}", message)
+                                     for number, level, message in sorted(numbered)]
+    for key in line.schedules:
+        if key not in sections:
+            diagnostics.append(("error", config_path, f"no '## {key}' section; the {key} schedule is not generated"))
+    return diagnostics
+
+
+# ── Generated timetables ──
+
+def _seconds(value) -> int:
+    """Seconds since midnight of a HH:MM:SS string, or -1 if malformed."""
+    match = _TIME_RE.match(value) if isinstance(value, str) else None
+    if match is None:
+        return -1
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + int(s)
+
+
+def _step(a: int, b: int) -> Tuple[int, bool]:
+    """(forward distance from a to b, whether it wraps past midnight); 0 when b is not shortly after a."""
+    step = (b - a) % gt.SECONDS_PER_DAY
+    return (step if step < WRAP_THRESHOLD else 0), b < a
+
+
+def check_timetable(path: str, line: gt.Line = None) -> List[Diagnostic]:
+    """Diagnostics for one station-major timetable file."""
+    line = line or gt.default_line()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return [("error", path, "missing; run generate_timetable.py")]
+    except OSError as e:
+        return [("error", path, f"unreadable: {e.strerror}")]
+    except ValueError as e:
+        return [("error", path, f"not valid JSON: {e}")]
+    if not isinstance(data, dict):
+        return [("error", path, "expected an object of station → direction → times")]
+
+    diagnostics: List[Diagnostic] = []
+    for station in data:
+        if station not in line.station_index:
+            diagnostics.append(("error", path, f"unknown station {station!r}"))
+    for station in line.station_names:
+        if station not in data:
+            diagnostics.append(("error", path, f"station {station!r} is missing"))
+            continue
+        if not isinstance(data[station], dict):
+            diagnostics.append(("error", f"{path}: {station}", "expected an object of direction → times"))
+            continue
+        for direction in data[station]:
+            if direction not in line.journey_tables:
+                diagnostics.append(("error", f"{path}: {station}", f"unknown direction {direction!r}"))
+    if diagnostics:
+        return diagnostics
+
+    for direction in line.directions:
+        route = [station for station, _ in line.journey_tables[direction]]
+        columns = []
+        for station in route:
+            times = data[station].get(direction)
+            if not isinstance(times, list):
+                diagnostics.append(("error", f"{path}: {station}", f"no times towards {direction}"))
+                continue
+            columns.append((station, times, [_seconds(t) for t in times]))
+        if len(columns) != len(route):
+            continue
+
+        # Down every station column: malformed times, order and headway
+        close: List[Tuple[int, str, str, str]] = []
+        for station, times, seconds in columns:
+            where = f"{path}: {station} → {direction}"
+            wrapped = False
+            for i, t in enumerate(seconds):
+                if t < 0:
+                    diagnostics.append(("error", f"{where} #{i + 1}", f"malformed time {times[i]!r}"))
+                    continue
+                if i == 0 or seconds[i - 1] < 0:
+                    continue
+                gap, wraps = _step(seconds[i - 1], t)
+                if wraps and wrapped:
+                    diagnostics.append(("error", f"{where} #{i + 1}", f"{times[i]} wraps past midnight a second time"))
+                wrapped = wrapped or wraps
+                if not gap:
+                    diagnostics.append(("error", f"{where} #{i + 1}",
+                                        f"{times[i]} is out of order after the previous train ({times[i - 1]})"))
+                elif gap < line.min_headway:
+                    diagnostics.append(("error", f"{where} #{i + 1}",
+                                        f"{times[i - 1]} → {times[i]} is {gt.format_duration(gap)}, below the minimum "
+                                        f"headway {gt.format_duration(line.min_headway)}"))
+                elif gap < gt.RUSH_HEADWAY:
+                    close.append((gap, station, times[i - 1], times[i]))
+        if close:
+            gap, station, a, b = min(close)
+            diagnostics.append(("warning", f"{path}: towards {direction}",
+                                f"{len(close)} gap(s) below the rush headway {gt.format_duration(gt.RUSH_HEADWAY)}, "
+                                f"smallest {gt.format_duration(gap)} at {station} ({a} → {b})"))
+
+        # Along every trip (the i-th train of each column)
+        counts = {len(times) for _, times, _ in columns}
+        if len(counts) > 1:
+            sizes = ", ".join(f"{station} {len(times)}" for station, times, _ in columns)
+            diagnostics.append(("error", f"{path}: towards {direction}", f"station columns differ in length ({sizes})"))
+            continue
+        for i in range(counts.pop()):
+            wrapped = False
+            for (prev_station, prev_times, prev), (station, times, seconds) in zip(columns, columns[1:]):
+                if prev[i] < 0 or seconds[i] < 0:
+                    continue
+                step, wraps = _step(prev[i], seconds[i])
+                if not step or (wraps and wrapped):
+                    diagnostics.append(("error", f"{path}: train #{i + 1} towards {direction}",
+                                        f"{station} {times[i]} is not after {prev_station} {prev_times[i]}"))
+                    break
+                wrapped = wrapped or wraps
+    return diagnostics
+
+
+def check_all(config_path: str = "timetable-config.md", lines: List[gt.Line] = ()) -> Tuple[List[Diagnostic], int]:
+    """Config and timetable diagnostics for every line and schedule, and the number of files checked."""
+    diagnostics, files = [], 0
+    for line, line_config in gt.network(config_path, lines):
+        sections, problems = gt.read_config_sections(line_config, line)
+        diagnostics += check_config(line_config, sections, problems, line)
+        outputs = dict(line.schedules)
+        labels = [line.slot_labels[direction] for direction in line.directions]
+        outputs.update({key: line.schedule_output(key, section.title) for key, section in sections.items()
+                        if key not in outputs and all(label in section.blocks for label in labels)})
+        for output_file, _ in outputs.values():
+            diagnostics += check_timetable(output_file, line)
+        files += 1 + len(outputs)
+    return diagnostics, files
+
+
+def run_check(config_path: str = "timetable-config.md", lines: List[gt.Line] = ()) -> bool:
+    """Run every check and print the diagnostics; returns True if there are no errors."""
+    started = time.perf_counter()
+    diagnostics, files = check_all(config_path, lines)
+    elapsed = time.perf_counter() - started
+
+    reported: Dict[str, int] = {}
+    for level, location, message in diagnostics:
+        source = location.split(":")[0]
+        reported[source] = reported.get(source, 0) + 1
+        if reported[source] <= MAX_REPORTED:
+            print(f"{'❌' if level == 'error' else '⚠'} {location}: {message}")
+    for source, count in reported.items():
+        if count > MAX_REPORTED:
+            print(f"  … and {count - MAX_REPORTED} more in {source}")
+
+    errors = sum(1 for level, _, _ in diagnostics if level == "error")
+    warnings = len(diagnostics) - errors
+    if errors:
+        print(f"\n❌ {errors} error(s), {warnings} warning(s) in {files} file(s) ({elapsed * 1000:.1f} ms)")
+        return False
+    print(f"✓ {files} file(s) consistent, {warnings} warning(s) ({elapsed * 1000:.1f} ms)")
+    return True
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Delay Propagation
+Projects how a delay injected into one train spreads through a generated
+schedule, for offline robustness studies and for projected times in the
+local service.
+
+A delay model is built once per schedule plan (see plan_schedule) from the
+same station offsets the timetables are written with. An incident holds one
+train at one station for a number of seconds; from there the delay
+
+  - runs down the line with the train, shrinking at every later station by
+    that station's dwell slack: the scheduled dwell above the shortest wait
+    category (WAIT_CATEGORIES), which a late train can cut;
+  - passes to the following train of the same direction wherever the two
+    would come closer than the line's MIN_HEADWAY at a station;
+  - passes to the trainset's next trip at the terminal when it arrives too
+    late for the minimum turnaround (trainsets as assigned by
+    plan_circulation).
+
+Trips are processed in departure order from a heap, starting at the
+incident and following only trips that are actually delayed, so a scenario
+costs time in proportion to the trains it reaches. Batches of scenarios can
+be run in a process pool.
+
+Run via:  python3 generate_timetable.py --delay-sweep 3:00 [--jobs N]
+"""
+
+import heapq
+import time
+from typing import Dict, List, Tuple
+
+import generate_timetable as gt
+
+Scenario = Tuple[str, str, int]   # (train ID, station, delay in seconds)
+
+SWEEP_REPORT_WORST = 5
+
+
+class DelayModel:
+    """Trips of one schedule plan, in departure order, with their slack and successors."""
+
+    def __init__(self, plans: Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[int]]]],
+                 line: gt.Line = None):
+        line = line or gt.default_line()
+        self.line = line
+        self.routes = {direction: [station for station, _ in line.journey_tables[direction]]
+                       for direction in plans}
+        self.positions = {direction: {station: k for k, station in enumerate(route)}
+                          for direction, route in self.routes.items()}
+
+        # Per direction and period: departure offsets along the route and the
+        # dwell each station can give up
+        dwell_table = line.dwell_table()
+        min_dwell = min(line.wait_categories.values())
+        self.offsets: Dict[str, Dict[str, List[int]]] = {}
+        self.slack: Dict[str, Dict[str, List[int]]] = {}
+        for direction, route in self.routes.items():
+            journey_times = line.journey_tables[direction]
+            self.offsets[direction], self.slack[direction] = {}, {}
+            for period in gt.PERIOD_TYPES:
+                arrivals = gt.compute_station_offsets(journey_times, period, direction, line)
+                dwell = [dwell_table[period][direction][line.station_index[station]] for station in route]
+                self.offsets[direction][period] = [arrivals[station] + d for station, d in zip(route, dwell)]
+                self.slack[direction][period] = [max(0, d - min_dwell) if d else 0 for d in dwell]
+
+        circulation = gt.plan_circulation(plans, line)
+        self.trips = circulation["assignments"]   # (direction, departure, period, trainset)
+        self.ids = [gt.train_id(direction, dep, period, line) for direction, dep, period, _ in self.trips]
+        self.index = {train: j for j, train in enumerate(self.ids)}
+
+        count = len(self.trips)
+        self.ahead = [-1] * count        # previous trip of the same direction
+        self.behind = [-1] * count       # next trip of the same direction
+        self.next_trip = [-1] * count    # the trainset's next trip
+        self.turn_slack = [0] * count    # spare time at the terminal before it
+        last_of_direction: Dict[str, int] = {}
+        last_of_unit: Dict[int, int] = {}
+        for j, (direction, dep, period, unit) in enumerate(self.trips):
+            p = last_of_direction.get(direction, -1)
+            if p >= 0:
+                self.ahead[j], self.behind[p] = p, j
+            last_of_direction[direction] = j
+            q = last_of_unit.get(unit)
+            if q is not None:
+                self.next_trip[q] = j
+                q_direction, q_dep, q_period, _ = self.trips[q]
+                arrival = q_dep + self.offsets[q_direction][q_period][-1]
+                self.turn_slack[q] = max(0, dep - arrival - line.min_turnaround)
+            last_of_unit[unit] = j
+
+        self.prev_trip = [-1] * count
+        for q, j in enumerate(self.next_trip):
+            if j >= 0:
+                self.prev_trip[j] = q
+
+    def scenario(self, train: str, station: str, delay: int) -> Tuple[int, int, int]:
+        """(trip, route position, seconds) of an incident; raises KeyError for unknown names."""
+        if train not in self.index:
+            raise KeyError(f"Unknown train: {train}")
+        j = self.index[train]
+        positions = self.positions[self.trips[j][0]]
+        if station not in positions:
+            raise KeyError(f"Unknown station: {station}")
+        return j, positions[station], int(delay)
+
+    def propagate(self, train: str, station: str, delay: int) -> Dict[int, List[int]]:
+        """Departure delay (seconds) at every route position of every trip the incident reaches.
+
+        Keys are trip numbers (departure order); trips left on time are omitted.
+        """
+        trip, position, delay = self.scenario(train, station, delay)
+        min_headway = self.line.min_headway
+        delayed: Dict[int, List[int]] = {}
+        queue, queued = [trip], {trip}
+        while queue:
+            j = heapq.heappop(queue)
+            direction, dep, period, _ = self.trips[j]
+            offsets, slack = self.offsets[direction][period], self.slack[direction][period]
+
+            q = self.prev_trip[j]
+            d = max(0, delayed[q][-1] - self.turn_slack[q]) if q in delayed else 0
+            p = self.ahead[j]
+            ahead = delayed.get(p)
+            if ahead:
+                _, p_dep, p_period, _ = self.trips[p]
+                p_offsets = self.offsets[direction][p_period]
+
+            row = []
+            for k, offset in enumerate(offsets):
+                if k:
+                    d = max(0, d - slack[k])
+                if ahead:
+                    spare = dep + offset - p_dep - p_offsets[k] - min_headway
+                    d = max(d, ahead[k] - max(0, spare))
+                if j == trip and k == position:
+                    d += delay
+                row.append(d)
+
+            if any(row):
+                delayed[j] = row
+                for successor in (self.behind[j], self.next_trip[j]):
+                    if successor >= 0 and successor not in queued:
+                        queued.add(successor)
+                        heapq.heappush(queue, successor)
+        return delayed
+
+    def summarize(self, scenario: Scenario, delayed: Dict[int, List[int]]) -> dict:
+        """Knock-on figures of one propagated scenario (delays at the terminal, in seconds)."""
+        train, station, delay = scenario
+        arrivals = {j: row[-1] for j, row in delayed.items()}
+        # Delays are cleared once the last delayed trip reaches its terminal
+        cleared = max((self.trips[j][1] + self.offsets[self.trips[j][0]][self.trips[j][2]][-1] + d
+                       for j, d in arrivals.items()), default=None)
+        return {
+            "train": train,
+            "station": station,
+            "delay": delay,
+            "trains_delayed": len(delayed),
+            "knock_on": len(delayed) - (self.index[train] in delayed),
+            "total_delay": sum(arrivals.values()),
+            "max_delay": max(arrivals.values(), default=0),
+            "recovered_by": gt.format_seconds(cleared) if cleared is not None else None,
+        }
+
+    def simulate(self, scenario: Scenario) -> dict:
+        return self.summarize(scenario, self.propagate(*scenario))
+
+    def projected_times(self, delayed: Dict[int, List[int]]) -> Dict[str, dict]:
+        """Train ID → route, per-station delays and projected departures of every delayed trip."""
+        projected = {}
+        for j in sorted(delayed):
+            direction, dep, period, _ = self.trips[j]
+            row = delayed[j]
+            projected[self.ids[j]] = {
+                "direction": direction,
+                "route": self.routes[direction],
+                "delays": row,
+                "departures": [gt.format_seconds(dep + offset + d)
+                               for offset, d in zip(self.offsets[direction][period], row)],
+            }
+        return projected
+
+    def origin_sweep(self, delay: int) -> List[Scenario]:
+        """One scenario per trip: the train held at its origin for delay seconds."""
+        return [(self.ids[j], self.routes[direction][0], delay)
+                for j, (direction, _, _, _) in enumerate(self.trips)]
+
+
+def simulate_batch(model: DelayModel, scenarios: List[Scenario], jobs: int = 1) -> List[dict]:
+    """Summaries of many scenarios, in input order; uses a process pool when jobs > 1."""
+    if jobs <= 1:
+        return [model.simulate(scenario) for scenario in scenarios]
+    with gt.shared_pool(jobs, model) as pool:
+        return gt.map_shared(pool, "simulate", scenarios, jobs)
+
+
+def format_sweep_report(schedule_name: str, results: List[dict], seconds: float) -> List[str]:
+    """Console lines for one schedule's origin-delay sweep."""
+    if not results:
+        return [f"↷ {schedule_name}: no trains"]
+    count = len(results)
+    contained = sum(1 for r in results if not r["knock_on"])
+    lines = [
+        f"✓ {schedule_name}: {count} scenario(s) in {seconds * 1000:.1f} ms",
+        f"  Contained to the delayed train: {contained} of {count}",
+        f"  Average knock-on: {sum(r['knock_on'] for r in results) / count:.1f} train(s), "
+        f"{sum(r['total_delay'] for r in results) / count / 60:.1f} train-min at terminals",
+    ]
+    worst = sorted((r for r in results if r["knock_on"]), key=lambda r: (-r["total_delay"], r["train"]))
+    for r in worst[:SWEEP_REPORT_WORST]:
+        lines.append(f"  ⚠ {r['train']}: {r['knock_on']} more train(s) delayed, "
+                     f"{r['total_delay'] / 60:.1f} train-min, recovered by {r['recovered_by']}")
+    return lines
+
+
+def run_delay_sweep(delay: int, config_path: str = "timetable-config.md", lines: List[gt.Line] = (),
+                    jobs: int = 1):
+    """Hold every train of every schedule at its origin in turn and print how far the delay spreads."""
+    for line, line_config in gt.network(config_path, lines):
+        print(f"\n{line.name}: {gt.format_duration(delay)} at the origin, "
+              f"minimum headway {gt.format_duration(line.min_headway)}, "
+              f"turnaround {gt.format_duration(line.min_turnaround)}")
+        for (_, schedule_name), first_slots, second_slots in gt.read_config_file(line_config, line).values():
+            model = DelayModel(gt.plan_schedule(first_slots, second_slots, gt.quiet, line), line)
+            started = time.perf_counter()
+            results = simulate_batch(model, model.origin_sweep(delay), jobs)
+            for report_line in format_sweep_report(schedule_name, results, time.perf_counter() - started):
+                print(report_line)
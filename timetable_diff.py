@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Schedule Diff
+Compares the timetables two config revisions generate, as a review summary
+instead of thousands of lines of JSON diff.
+
+Both revisions are generated in memory. Trains are matched by their stable
+identity, direction and origin departure (what train IDs are made of), with
+one sorted merge per direction, so a comparison costs time linear in the
+number of trains. The summary shows, per schedule and direction:
+
+  - trains added and removed, grouped by the slot that generates them
+  - per-station time shifts of trains present in both revisions (run-time
+    and dwell edits, or a slot changing its period type)
+  - hours whose number of trains, and so the average headway, changed
+
+A revision is a config file or a git revision of it ("HEAD", "main~3" or
+"REV:path"). Dwell rule changes are compared by passing the old line as a
+JSON data file (see --export-line).
+
+Run via:  python3 generate_timetable.py --diff HEAD [--diff-line before.json]
+"""
+
+import os
+import subprocess
+import tempfile
+from typing import Dict, List, NamedTuple, Tuple
+
+import generate_timetable as gt
+
+# Times listed per added/removed slot before the rest are only counted
+MAX_LISTED = 4
+
+
+class Revision(NamedTuple):
+    label: str
+    line: gt.Line
+    schedules: Dict[str, Tuple[Tuple[str, str], List[tuple], List[tuple]]]   # as read_config_file returns
+
+
+class DirectionDiff(NamedTuple):
+    old_count: int
+    new_count: int
+    added: List[Tuple[int, int, tuple]]      # (departure, slot number, slot) in the new revision
+    removed: List[Tuple[int, int, tuple]]    # (departure, slot number, slot) in the old revision
+    retimed: int                             # trains in both with a different time somewhere
+    shifts: Dict[str, List[int]]             # station → non-zero shifts (seconds) of trains in both, route order
+    hours: List[Tuple[int, int, int]]        # (hour, old trains, new trains) where they differ
+
+
+def _signed(seconds: int) -> str:
+    sign = "+" if seconds >= 0 else "−"
+    return sign + gt.format_duration(abs(seconds))
+
+
+def config_text(spec: str, config_path: str) -> str:
+    """Contents of a config revision: a file path, or a git revision of config_path."""
+    if os.path.isfile(spec):
+        with open(spec, 'r', encoding='utf-8') as f:
+            return f.read()
+    target = spec if ":" in spec else f"{spec}:./{config_path}"
+    try:
+        return subprocess.run(["git", "show", target], capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        raise ValueError(f"'{spec}' is neither a config file nor a git revision of {config_path}") from None
+
+
+def load_revision(spec: str, config_path: str = "timetable-config.md", line: gt.Line = None) -> Revision:
+    """Read a config revision's schedules for a line (default: MRT-6 as defined now)."""
+    line = line or gt.default_line()
+    if os.path.isfile(spec):
+        return Revision(spec, line, gt.read_config_file(spec, line))
+    with tempfile.NamedTemporaryFile('w', suffix=".md", encoding='utf-8', delete=False) as f:
+        f.write(config_text(spec, config_path))
+    try:
+        return Revision(spec, line, gt.read_config_file(f.name, line))
+    finally:
+        os.unlink(f.name)
+
+
+def _trains(slots: List[tuple]) -> List[Tuple[int, str, int, tuple]]:
+    """(departure, period type, slot number, slot) of every train, in departure order."""
+    slot_of: Dict[int, Tuple[int, tuple]] = {}
+    for i, slot, trains, _ in gt.iter_slot_departures(slots):
+        for t in trains:
+            slot_of.setdefault(t, (i, slot))
+    return [(dep, period, *slot_of[dep]) for dep, period in gt.collect_departures(slots, gt.quiet)]
+
+
+def _trains_per_hour(trains: List[Tuple[int, str, int, tuple]]) -> Dict[int, int]:
+    hours: Dict[int, int] = {}
+    for dep, _, _, _ in trains:
+        hours[dep // 3600] = hours.get(dep // 3600, 0) + 1
+    return hours
+
+
+def diff_direction(direction: str, old_slots: List[tuple], new_slots: List[tuple],
+                   old_line: gt.Line, new_line: gt.Line) -> DirectionDiff:
+    """Merge the two revisions' trains of one direction by origin departure."""
+    old, new = _trains(old_slots), _trains(new_slots)
+    old_offsets = gt.compute_direction_offsets(direction, old_line)
+    new_offsets = gt.compute_direction_offsets(direction, new_line)
+    stations = new_line.station_names
+
+    added, removed, shifts = [], [], {}
+    retimed = i = j = 0
+    while i < len(old) or j < len(new):
+        if j == len(new) or (i < len(old) and old[i][0] < new[j][0]):
+            dep, _, slot_no, slot = old[i]
+            removed.append((dep, slot_no, slot))
+            i += 1
+        elif i == len(old) or new[j][0] < old[i][0]:
+            dep, _, slot_no, slot = new[j]
+            added.append((dep, slot_no, slot))
+            j += 1
+        else:
+            before, after = old_offsets[old[i][1]], new_offsets[new[j][1]]
+            moved = False
+            for station, a, b in zip(stations, before, after):
+                if a != b:
+                    shifts.setdefault(station, []).append(b - a)
+                    moved = True
+            retimed += moved
+            i += 1
+            j += 1
+
+    route = [station for station, _ in new_line.journey_tables[direction]]
+    shifts = {station: shifts[station] for station in route if station in shifts}
+
+    old_hours, new_hours = _trains_per_hour(old), _trains_per_hour(new)
+    hours = [(hour, old_hours.get(hour, 0), new_hours.get(hour, 0))
+             for hour in sorted(set(old_hours) | set(new_hours))
+             if old_hours.get(hour, 0) != new_hours.get(hour, 0)]
+    return DirectionDiff(len(old), len(new), added, removed, retimed, shifts, hours)
+
+
+def _slot_lines(mark: str, verb: str, trains: List[Tuple[int, int, tuple]]) -> List[str]:
+    by_slot: Dict[Tuple[int, tuple], List[int]] = {}
+    for dep, slot_no, slot in trains:
+        by_slot.setdefault((slot_no, slot), []).append(dep)
+    lines = []
+    for (slot_no, (start, end, headway, _)), deps in by_slot.items():
+        listed = ", ".join(gt.format_seconds(dep) for dep in deps[:MAX_LISTED])
+        more = f", … {len(deps) - MAX_LISTED} more" if len(deps) > MAX_LISTED else ""
+        lines.append(f"    {mark} slot {slot_no} ({start} | {end} | {gt.headway_display(headway)}): "
+                     f"{len(deps)} {verb} ({listed}{more})")
+    return lines
+
+
+def format_direction_diff(direction: str, d: DirectionDiff) -> List[str]:
+    """Summary lines for one direction; a single line when nothing changed."""
+    if not (d.added or d.removed or d.retimed):
+        return [f"  Towards {direction}: unchanged ({d.new_count} trains)"]
+    lines = [f"  Towards {direction}: {d.old_count} → {d.new_count} trains "
+             f"({len(d.added)} added, {len(d.removed)} removed, {d.retimed} retimed)"]
+    lines += _slot_lines("+", "added", d.added)
+    lines += _slot_lines("−", "removed", d.removed)
+    for station, shifts in d.shifts.items():
+        low, high = min(shifts), max(shifts)
+        change = _signed(low) if low == high else f"{_signed(low)} to {_signed(high)}"
+        lines.append(f"    ~ {station}: {change} on {len(shifts)} train(s)")
+    for hour, before, after in d.hours:
+        headways = f"{gt.format_duration(3600 // before) if before else '—'} → {gt.format_duration(3600 // after) if after else '—'}"
+        lines.append(f"    ⏱ {hour:02d}:00–{hour + 1:02d}:00: {before} → {after} trains, "
+                     f"average headway {headways}")
+    return lines
+
+
+def diff_revisions(old: Revision, new: Revision) -> List[str]:
+    """Summary lines comparing every schedule of two revisions."""
+    lines = []
+    for key in list(dict.fromkeys(list(old.schedules) + list(new.schedules))):
+        if key not in new.schedules:
+            lines.append(f"\n− {old.schedules[key][0][1]}: schedule removed")
+            continue
+        if key not in old.schedules:
+            lines.append(f"\n+ {new.schedules[key][0][1]}: schedule added")
+            continue
+        (_, name), *new_slots = new.schedules[key]
+        _, *old_slots = old.schedules[key]
+        lines.append(f"\n{name}")
+        for direction, old_direction_slots, new_direction_slots in zip(new.line.directions, old_slots, new_slots):
+            d = diff_direction(direction, old_direction_slots, new_direction_slots, old.line, new.line)
+            lines += format_direction_diff(direction, d)
+    return lines
+
+
+def run_diff(old_spec: str, config_path: str = "timetable-config.md", old_line_path: str = None) -> bool:
+    """Print the summary of config_path (and the current line) against an older revision."""
+    old_line = gt.load_line(old_line_path) if old_line_path else None
+    old = load_revision(old_spec, config_path, old_line)
+    new = load_revision(config_path, config_path)
+    print(f"Comparing {old.label} → {new.label}"
+          + (f" (dwell rules from {old_line_path} → current)" if old_line_path else ""))
+    for summary_line in diff_revisions(old, new):
+        print(summary_line)
+    return True
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Headway Optimizer
+Searches timing-slot configurations against an hourly demand profile and
+prints a ready-to-paste MOTIJHEEL_SLOTS / UTTARA_SLOTS block.
+
+Each direction's service span is split into hourly segments, and every
+segment is given a headway from a menu (rush, offpeak, 10:00, ...). A
+candidate is scored with the generator core: collect_departures expands
+its slots exactly as a config would (including the previous-slot gap
+rule), and plan_circulation counts the trainsets it needs. Scoring runs in
+memory, with no file I/O, printing or stage timing. The search is steepest
+descent over headway changes of one segment, or of one hour in both
+directions at once (which keeps the terminals balanced). It starts from the
+per-segment best guess and, when that needs more trainsets than the fleet,
+also from the sparsest timetable. Each round's candidates can be scored in a
+process pool.
+
+Demand profile (JSON):
+    {
+      "fleet": 24, "turnaround": "4:00", "min_headway": "5:00",
+      "capacity": 2300, "train_cost": 600,
+      "headways": ["rush", "offpeak", "10:00", "12:00", "15:00", "20:00"],
+      "directions": {
+        "Motijheel":    {"start": "630", "end": "2130", "hourly": {"7": 5200, "8": 6100, ...}},
+        "Uttara North": {"start": "715", "end": "2210", "hourly": {...}}
+      }
+    }
+hourly maps an hour of the day to passengers boarding in that hour; missing
+hours have no demand. Everything except "directions" is optional.
+
+Run via:  python3 generate_timetable.py --optimize demand.json [--jobs N]
+"""
+
+import json
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+import generate_timetable as gt
+
+DEFAULT_HEADWAYS = ("rush", "offpeak", "10:00", "12:00", "15:00", "20:00")
+TRAIN_CAPACITY = 2300       # passengers one 6-car trainset carries
+TRAIN_COST = 600            # passenger-minutes of waiting one extra train must save
+OVERLOAD_PENALTY = 30       # minutes charged per passenger the trains cannot carry
+FLEET_PENALTY = 1_000_000   # per trainset needed beyond the fleet
+MAX_ROUNDS = 500
+
+Candidate = Tuple[Tuple[int, ...], ...]   # per direction, a menu index per segment
+
+
+def _config_time(seconds: int) -> str:
+    """Seconds since midnight as a config time, e.g. 23400 → "630"."""
+    return f"{seconds // 3600}{seconds % 3600 // 60:02d}"
+
+
+class SlotProblem:
+    """A demand profile bound to a line, with everything candidates share precomputed."""
+
+    def __init__(self, demand: dict, line: gt.Line = None):
+        self.line = line or gt.default_line()
+        self.fleet = int(demand.get("fleet", self.line.fleet_size))
+        self.turnaround = gt.parse_duration(demand["turnaround"]) if "turnaround" in demand else self.line.min_turnaround
+        self.capacity = int(demand.get("capacity", TRAIN_CAPACITY))
+        self.train_cost = float(demand.get("train_cost", TRAIN_COST))
+
+        min_headway = gt.parse_duration(demand["min_headway"]) if "min_headway" in demand else 0
+        self.menu = [
+            label for label in demand.get("headways", DEFAULT_HEADWAYS)
+            if gt.headway_seconds(gt.parse_headway(label)) >= min_headway
+        ]
+        if not self.menu:
+            raise ValueError("no headway in the menu satisfies min_headway")
+        self.menu_slots = [(gt.parse_headway(label), gt.headway_period_type(label)) for label in self.menu]
+        self.menu_seconds = [gt.headway_seconds(headway) for headway, _ in self.menu_slots]
+
+        # Per direction: [(segment start, segment end, passengers)], hour-aligned inside the service span
+        self.segments: List[List[Tuple[int, int, float]]] = []
+        for direction in self.line.directions:
+            if direction not in demand["directions"]:
+                raise ValueError(f"demand profile has no '{direction}' direction")
+            spec = demand["directions"][direction]
+            start, end = gt.parse_time_seconds(spec["start"]), gt.parse_time_seconds(spec["end"])
+            if end <= start:
+                raise ValueError(f"{direction}: service must end after it starts, on the same day")
+            hourly = {int(hour): float(passengers) for hour, passengers in spec.get("hourly", {}).items()}
+            bounds = [start] + list(range((start // 3600 + 1) * 3600, end, 3600)) + [end]
+            self.segments.append([
+                (a, b, hourly.get(a // 3600, 0.0) * (b - a) / 3600)
+                for a, b in zip(bounds, bounds[1:])
+            ])
+        # Hour of day → (direction number, segment number) of every segment starting in it
+        self.hours: Dict[int, List[Tuple[int, int]]] = {}
+        for d, segments in enumerate(self.segments):
+            for i, (start, _, _) in enumerate(segments):
+                self.hours.setdefault(start // 3600, []).append((d, i))
+        self.offsets = {direction: gt.compute_direction_offsets(direction, self.line) for direction in self.line.directions}
+
+    def slots(self, choice: Tuple[int, ...], segments: List[Tuple[int, int, float]]) -> List[tuple]:
+        """Slot tuples (as parse_slot returns them) for one direction; equal neighbours merge."""
+        slots = []
+        for (start, end, _), k in zip(segments, choice):
+            if slots and slots[-1][4] == k:
+                slots[-1][1] = end
+            else:
+                slots.append([start, end, *self.menu_slots[k], k])
+        return [(gt.format_seconds(a), gt.format_seconds(b), headway, period) for a, b, headway, period, _ in slots]
+
+    def initial_candidate(self) -> Candidate:
+        """Per segment, the headway with the lowest cost estimated in isolation (ignores the fleet)."""
+        def estimate(segment, k):
+            start, end, passengers = segment
+            trains = (end - start) / self.menu_seconds[k]
+            overload = max(0.0, passengers - trains * self.capacity)
+            return passengers * self.menu_seconds[k] / 120 + overload * OVERLOAD_PENALTY + trains * self.train_cost
+        return tuple(
+            tuple(min(range(len(self.menu)), key=lambda k: estimate(segment, k)) for segment in segments)
+            for segments in self.segments
+        )
+
+    def sparsest_candidate(self) -> Candidate:
+        """The longest headway in every segment: the fewest trains and trainsets."""
+        longest = max(range(len(self.menu)), key=self.menu_seconds.__getitem__)
+        return tuple((longest,) * len(segments) for segments in self.segments)
+
+    def neighbours(self, candidate: Candidate) -> List[Candidate]:
+        """Candidates that change one segment's headway, or one hour's headway in every direction."""
+        result = []
+        for d, choice in enumerate(candidate):
+            for i, current in enumerate(choice):
+                for k in range(len(self.menu)):
+                    if k != current:
+                        changed = choice[:i] + (k,) + choice[i + 1:]
+                        result.append(candidate[:d] + (changed,) + candidate[d + 1:])
+        for hour, members in self.hours.items():
+            if len(members) < 2:
+                continue
+            for k in range(len(self.menu)):
+                if all(candidate[d][i] == k for d, i in members):
+                    continue
+                changed = [list(choice) for choice in candidate]
+                for d, i in members:
+                    changed[d][i] = k
+                result.append(tuple(tuple(choice) for choice in changed))
+        return result
+
+    def evaluate(self, candidate: Candidate) -> dict:
+        """Score a candidate with the generator core; the in-memory evaluation path."""
+        plans = {}
+        wait = overload = 0.0
+        passengers = 0.0
+        trains = {}
+        for direction, choice, segments in zip(self.line.directions, candidate, self.segments):
+            departures = gt.collect_departures(self.slots(choice, segments), gt.quiet)
+            plans[direction] = (departures, self.offsets[direction])
+            trains[direction] = len(departures)
+            times = [dep for dep, _ in departures]
+            for (start, end, demand), k in zip(segments, choice):
+                running = bisect_left(times, end) - bisect_left(times, start)
+                wait += demand * self.menu_seconds[k] / 120
+                overload += max(0.0, demand - running * self.capacity)
+                passengers += demand
+        trainsets = gt.plan_circulation(plans, self.line, self.turnaround)["trainsets"]
+        cost = (wait + overload * OVERLOAD_PENALTY + sum(trains.values()) * self.train_cost
+                + max(0, trainsets - self.fleet) * FLEET_PENALTY)
+        return {
+            "cost": cost,
+            "trains": trains,
+            "trainsets": trainsets,
+            "average_wait": wait / passengers if passengers else 0.0,   # minutes
+            "overload": overload,
+        }
+
+    def cost(self, candidate: Candidate) -> float:
+        return self.evaluate(candidate)["cost"]
+
+    def slot_block(self, candidate: Candidate) -> List[str]:
+        """The candidate as config lines, ready to paste into timetable-config.md."""
+        lines = []
+        for direction, choice, segments in zip(self.line.directions, candidate, self.segments):
+            if lines:
+                lines.append("")
+            lines.append(f"{self.line.slot_labels[direction]}:")
+            merged = []
+            for (start, end, _), k in zip(segments, choice):
+                if merged and merged[-1][2] == k:
+                    merged[-1][1] = end
+                else:
+                    merged.append([start, end, k])
+            lines.extend(f"{_config_time(a)} | {_config_time(b)} | {self.menu[k]}" for a, b, k in merged)
+        return lines
+
+
+def load_demand(path: str) -> dict:
+    """Read a demand profile JSON file; raises ValueError when it lacks directions or their service spans."""
+    with open(path, 'r', encoding='utf-8') as f:
+        demand = json.load(f)
+    if not isinstance(demand, dict) or not isinstance(demand.get("directions"), dict):
+        raise ValueError(f"{path}: expected an object with a \"directions\" object")
+    for direction, spec in demand["directions"].items():
+        if not isinstance(spec, dict) or "start" not in spec or "end" not in spec:
+            raise ValueError(f"{path}: direction '{direction}' needs \"start\" and \"end\" times")
+    return demand
+
+
+def optimize(problem: SlotProblem, jobs: int = 1, max_rounds: int = MAX_ROUNDS,
+             log: Callable[[str], None] = print) -> Tuple[Candidate, dict]:
+    """Steepest descent; returns (best candidate, search stats).
+
+    Each round scores every neighbour and moves to the best one if it lowers
+    the cost. Ties go to the first candidate in neighbours() order, so
+    results are the same for any number of jobs.
+    """
+    started = time.perf_counter()
+    metrics_enabled, gt.metrics.enabled = gt.metrics.enabled, False
+    pool = gt.shared_pool(jobs, problem) if jobs > 1 else None
+
+    def score(candidates: List[Candidate]) -> List[float]:
+        if pool:
+            return gt.map_shared(pool, "cost", candidates, jobs)
+        return [problem.cost(candidate) for candidate in candidates]
+
+    starts = [problem.initial_candidate()]
+    evaluations = rounds = 0
+    best_cost, best = None, None
+    try:
+        if problem.evaluate(starts[0])["trainsets"] > problem.fleet:
+            starts.append(problem.sparsest_candidate())
+        for n, current in enumerate(starts, 1):
+            cost = problem.cost(current)
+            evaluations += 1
+            for _ in range(max_rounds):
+                candidates = problem.neighbours(current)
+                costs = score(candidates)
+                evaluations += len(candidates)
+                rounds += 1
+                i = min(range(len(costs)), key=costs.__getitem__)
+                if costs[i] >= cost:
+                    break
+                cost, current = costs[i], candidates[i]
+            log(f"  Start {n}: cost {cost:,.0f}")
+            if best_cost is None or cost < best_cost:
+                best_cost, best = cost, current
+    finally:
+        gt.metrics.enabled = metrics_enabled
+        if pool:
+            pool.shutdown()
+    elapsed = time.perf_counter() - started
+    return best, {"evaluations": evaluations, "rounds": rounds, "seconds": elapsed,
+                  "rate": evaluations / elapsed if elapsed else 0.0}
+
+
+def run_optimizer(demand_path: str, jobs: int = 1, line: gt.Line = None) -> bool:
+    """Optimize slots for a demand profile and print the result; True if it fits the fleet."""
+    problem = SlotProblem(load_demand(demand_path), line)
+    print(f"Optimizing {problem.line.name} headways for {demand_path}")
+    print(f"  Menu: {', '.join(problem.menu)} · fleet {problem.fleet} · "
+          f"turnaround {gt.format_duration(problem.turnaround)}")
+
+    candidate, stats = optimize(problem, jobs)
+    result = problem.evaluate(candidate)
+    print(f"\n✓ {stats['evaluations']:,} candidates in {stats['seconds']:.2f} s "
+          f"({stats['rate']:,.0f}/s, {stats['rounds']} rounds, {jobs} job(s))")
+    print(f"  Trains: " + ", ".join(f"{n} towards {direction}" for direction, n in result["trains"].items()))
+    print(f"  Trainsets needed: {result['trainsets']} of {problem.fleet}")
+    print(f"  Average wait: {result['average_wait']:.1f} min")
+    if result["overload"]:
+        print(f"  ⚠ {result['overload']:,.0f} passenger(s) exceed train capacity")
+
+    print("\nPaste into the schedule section of timetable-config.md:\n")
+    print("```")
+    for config_line in problem.slot_block(candidate):
+        print(config_line)
+    print("```")
+
+    if result["trainsets"] > problem.fleet:
+        print(f"\n❌ No candidate found within the fleet of {problem.fleet} trainsets")
+        return False
+    return True
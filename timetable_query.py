@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Timetable Queries
+"Next train" lookups over generated timetables in O(log n) per query.
+
+Reference implementation of the station view in docs/script.js, and the
+backend for local services. Works on the index written by
+`generate_timetable.py --formats index` (mrt-6.index.json) or builds the
+same index from a station-major mrt-6*.json file.
+
+Times are seconds since midnight. Waits wrap past midnight the same way
+generate_timetable._time_gap does: a 00:10 train is 15 minutes after 23:55.
+"""
+
+import json
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from generate_timetable import SECONDS_PER_DAY, format_seconds, parse_time_seconds
+
+# Matches the "at platform" / "departed" windows in docs/script.js
+AT_PLATFORM_WINDOW = 60    # departure is 0–60 s away — train is dwelling
+DEPARTED_WINDOW = 30       # departure was 0–30 s ago — train just left
+
+
+class Departure(NamedTuple):
+    time: str                 # HH:MM:SS as shown in the timetable
+    seconds: int              # seconds since midnight
+    wait: int                 # seconds from the query time (negative for past trains)
+    train_id: Optional[str]   # stable train ID, None when built from station-major JSON
+
+
+def _to_seconds(t: Union[int, str]) -> int:
+    """Accept seconds since midnight or a config/timetable time string."""
+    if isinstance(t, str):
+        return parse_time_seconds(t)
+    return int(t) % SECONDS_PER_DAY
+
+
+class DepartureIndex:
+    """Sorted per-station, per-direction departure times of one schedule."""
+
+    def __init__(self, stations: Dict[str, Dict[str, dict]]):
+        # stations[station][direction] = {"times": [sorted seconds], "trains": [ids or None]}
+        self.stations = stations
+
+    @classmethod
+    def from_timetable(cls, timetable: Dict[str, Dict[str, List[str]]]) -> "DepartureIndex":
+        """Build the index from a station-major timetable ({station: {direction: [times]}})."""
+        stations = {}
+        for station, directions in timetable.items():
+            stations[station] = {}
+            for direction, times in directions.items():
+                seconds = sorted(parse_time_seconds(t) for t in times)
+                stations[station][direction] = {"times": seconds, "trains": [None] * len(seconds)}
+        return cls(stations)
+
+    @classmethod
+    def load(cls, path: str) -> "DepartureIndex":
+        """Load an .index.json file, or index a station-major timetable JSON file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format") == "mrt-timetable-index":
+            return cls(data["stations"])
+        return cls.from_timetable(data)
+
+    def _column(self, station: str, direction: str) -> dict:
+        try:
+            return self.stations[station][direction]
+        except KeyError:
+            raise KeyError(f"Unknown station/direction: {station!r} → {direction!r}") from None
+
+    def _departure(self, column: dict, position: int, t: int, forward: bool) -> Departure:
+        seconds = column["times"][position]
+        wait = (seconds - t) % SECONDS_PER_DAY if forward else -((t - seconds) % SECONDS_PER_DAY)
+        return Departure(format_seconds(seconds), seconds, wait, column["trains"][position])
+
+    def next_departures(self, station: str, direction: str, t: Union[int, str], k: int = 10,
+                        wrap: bool = True) -> List[Departure]:
+        """The next k departures at or after t.
+
+        With wrap=False only trains later the same day are returned, exactly
+        like the upcoming list in docs/script.js; with wrap=True the search
+        continues past midnight into the start of the timetable.
+        """
+        column = self._column(station, direction)
+        t = _to_seconds(t)
+        times = column["times"]
+        start = bisect_left(times, t)
+        count = min(k, len(times)) if wrap else min(k, len(times) - start)
+        return [self._departure(column, (start + j) % len(times), t, True) for j in range(count)]
+
+    def recent_departures(self, station: str, direction: str, t: Union[int, str], k: int = 2,
+                          wrap: bool = True) -> List[Departure]:
+        """The last k departures strictly before t, oldest first (the "past trains" list)."""
+        column = self._column(station, direction)
+        t = _to_seconds(t)
+        times = column["times"]
+        end = bisect_left(times, t)
+        count = min(k, len(times)) if wrap else min(k, end)
+        return [self._departure(column, (end - count + j) % len(times), t, False) for j in range(count)]
+
+    def platform_status(self, station: str, direction: str, t: Union[int, str]) -> Optional[str]:
+        """"at_platform", "departed" or None, as in the arrival banner of docs/script.js."""
+        upcoming = self.next_departures(station, direction, t, k=1)
+        if upcoming and upcoming[0].wait <= AT_PLATFORM_WINDOW:
+            return "at_platform"
+        past = self.recent_departures(station, direction, t, k=1)
+        if past and 0 < -past[0].wait <= DEPARTED_WINDOW:
+            return "departed"
+        return None
+
+
+def next_departures(index: DepartureIndex, station: str, direction: str, t: Union[int, str],
+                    k: int = 10) -> List[Departure]:
+    """Convenience wrapper for DepartureIndex.next_departures."""
+    return index.next_departures(station, direction, t, k)
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Next trains at a station")
+    parser.add_argument("timetable", help="mrt-6*.json or mrt-6*.index.json")
+    parser.add_argument("station")
+    parser.add_argument("direction", help='"Motijheel" or "Uttara North"')
+    parser.add_argument("time", nargs="?", help="HH:MM[:SS] (default: now)")
+    parser.add_argument("-n", type=int, default=10, help="number of trains (default: 10)")
+    args = parser.parse_args()
+
+    query_time = args.time or datetime.now().strftime("%H:%M:%S")
+    for departure in DepartureIndex.load(args.timetable).next_departures(args.station, args.direction, query_time, args.n):
+        print(f"{departure.time}  in {departure.wait // 60:>4} min  {departure.train_id or ''}")
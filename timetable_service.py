@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Timetable Service
+Stdlib-only local HTTP API over the generated timetables, for kiosks and
+signage boards that poll for the next trains.
+
+Schedules are generated in memory from the config once at start-up. The
+schedule for a request is looked up in the compiled service calendar
+(docs/service-calendar.json) when there is one, and otherwise picked with
+the same rule as getTrainTimesFile in docs/script.js (Friday → friday,
+Saturday → saturday, otherwise weekdays), using Dhaka time.
+
+Endpoints (all JSON, with ETag / If-None-Match → 304):
+    /next?station=&direction=&n=    next departures and platform status
+    /trip/{train_id}                 one trip's arrival/departure vectors
+    /station/{name}                  full timetable of one station
+    /projected?train=&station=&delay=  times of every train a delay reaches
+                                     (delay in seconds or M:SS)
+Any endpoint accepts ?schedule=weekdays|friday|saturday and /next accepts
+?t=HH:MM[:SS] to override the clock.
+
+Run via:  python3 generate_timetable.py --serve [--host 127.0.0.1] [--port 8765]
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import generate_timetable as gt
+from timetable_calendar import CALENDAR_FILE, load_compiled, resolve
+from timetable_delay import DelayModel
+from timetable_query import DepartureIndex
+
+DHAKA_TZ = timezone(timedelta(hours=6))
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def _encode(payload) -> Tuple[bytes, str]:
+    """JSON body and its ETag."""
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return body, '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class LoadedSchedule:
+    """One schedule held in memory: departure index, trips and pre-encoded station bodies."""
+
+    def __init__(self, key: str, slots_motijheel, slots_uttara):
+        plans = gt.plan_schedule(slots_motijheel, slots_uttara, gt.quiet)
+        columns = {direction: gt.build_station_times(*plan) for direction, plan in plans.items()}
+        timetable = gt.assemble_timetable(columns)
+
+        self.key = key
+        self.index = DepartureIndex(gt.build_departure_index(plans)["stations"])
+        self.trips = gt.build_trips(plans)["trips"]
+        self.delay_model = DelayModel(plans)
+        self.station_bodies = {
+            station: _encode({"schedule": key, "station": station, "timetable": times})
+            for station, times in timetable.items()
+        }
+        self._trip_bodies: Dict[str, Tuple[bytes, str]] = {}
+
+    def trip_body(self, train_id: str) -> Optional[Tuple[bytes, str]]:
+        if train_id not in self.trips:
+            return None
+        if train_id not in self._trip_bodies:
+            self._trip_bodies[train_id] = _encode({"schedule": self.key, "id": train_id, **self.trips[train_id]})
+        return self._trip_bodies[train_id]
+
+
+def load_schedules(config_path: str = "timetable-config.md") -> Dict[str, LoadedSchedule]:
+    """Generate every schedule in the config into memory."""
+    return {
+        key: LoadedSchedule(key, slots_motijheel, slots_uttara)
+        for key, (_, slots_motijheel, slots_uttara) in gt.read_config_file(config_path).items()
+    }
+
+
+class TimetableRequestHandler(BaseHTTPRequestHandler):
+    """Routes /next, /trip/{id} and /station/{name}; schedules are set on the server."""
+
+    server_version = "MRTTimetable/1"
+
+    def log_message(self, format, *args):
+        # Polling clients would flood the console; errors are still reported via log_error
+        pass
+
+    def _send(self, status: int, body: bytes = b"", etag: str = None):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({"error": message}).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        now = datetime.now(DHAKA_TZ)
+        schedules: Dict[str, LoadedSchedule] = self.server.schedules
+        calendar = self.server.calendar
+        key = query.get("schedule") or (resolve(calendar, now.date()) if calendar else gt.schedule_for_date(now))
+        schedule = schedules.get(key)
+        if schedule is None:
+            return self._error(404, f"Unknown schedule: {key}")
+
+        path = unquote(url.path).rstrip("/")
+        try:
+            if path == "/next":
+                return self._next(schedule, query, now)
+            if path.startswith("/trip/"):
+                train_id = path[len("/trip/"):]
+                # Trip content only depends on direction, departure and period,
+                # so fall back to the other schedules for IDs not running today
+                for candidate in [schedule] + list(schedules.values()):
+                    found = candidate.trip_body(train_id)
+                    if found:
+                        return self._send(200, *found)
+                return self._error(404, f"Unknown train: {train_id}")
+            if path == "/projected":
+                return self._projected(schedule, query)
+            if path.startswith("/station/"):
+                station = path[len("/station/"):]
+                if station not in schedule.station_bodies:
+                    return self._error(404, f"Unknown station: {station}")
+                return self._send(200, *schedule.station_bodies[station])
+        except (KeyError, ValueError) as e:
+            return self._error(400, e.args[0] if e.args else str(e))
+        return self._error(404, "Use /next, /trip/{id}, /station/{name} or /projected")
+
+    def _next(self, schedule: LoadedSchedule, query: Dict[str, str], now: datetime):
+        station, direction = query.get("station"), query.get("direction")
+        if not station or not direction:
+            raise ValueError("station and direction are required")
+        t = query.get("t") or now.strftime("%H:%M:%S")
+        departures = schedule.index.next_departures(station, direction, t, int(query.get("n", 10)))
+        payload = {
+            "schedule": schedule.key,
+            "station": station,
+            "direction": direction,
+            "time": gt.format_seconds(gt.parse_time_seconds(t)),
+            "status": schedule.index.platform_status(station, direction, t),
+            "departures": [
+                {"time": d.time, "wait": d.wait, "train_id": d.train_id} for d in departures
+            ],
+        }
+        self._send(200, *_encode(payload))
+
+    def _projected(self, schedule: LoadedSchedule, query: Dict[str, str]):
+        train, station, delay = query.get("train"), query.get("station"), query.get("delay")
+        if not train or not station or not delay:
+            raise ValueError("train, station and delay are required")
+        seconds = gt.parse_duration(delay) if ":" in delay else int(delay)
+        model = schedule.delay_model
+        delayed = model.propagate(train, station, seconds)
+        payload = {
+            "schedule": schedule.key,
+            **model.summarize((train, station, seconds), delayed),
+            "trains": model.projected_times(delayed),
+        }
+        self._send(200, *_encode(payload))
+
+
+def serve(config_path: str = "timetable-config.md", host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          calendar_path: str = CALENDAR_FILE):
+    """Load all schedules (and the service calendar, if compiled) and serve them until interrupted."""
+    schedules = load_schedules(config_path)
+    server = ThreadingHTTPServer((host, port), TimetableRequestHandler)
+    server.schedules = schedules
+    server.calendar = load_compiled(calendar_path) if calendar_path and os.path.exists(calendar_path) else None
+    print(f"✓ Loaded {len(schedules)} schedule(s): {', '.join(schedules)}")
+    if server.calendar:
+        print(f"✓ Service calendar from {server.calendar['start']}, {server.calendar['days']} day(s)")
+    print(f"🚆 Serving on http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Service Stream
+Lazily generates every trip over a horizon of days — weeks or months of
+service for capacity studies — and streams it to JSON Lines or CSV.
+
+Each stage is a generator:
+
+    slots → departures (one sorted stream per slot, merged with heapq.merge,
+            de-duplicated) → trips (station times) → all directions and
+            lines of a day merged by departure → one day after another
+
+so memory depends on the size of one day's timetable, not on the horizon.
+The schedule of each date follows the site's day-of-week rule, with
+per-date overrides from a holiday/exception file (see timetable_calendar).
+
+Run via:  python3 generate_timetable.py --stream trips.jsonl --start 2026-01-01 --days 90
+"""
+
+import csv
+import heapq
+import json
+from datetime import date, timedelta
+from typing import Dict, IO, Iterator, List, Tuple
+
+import generate_timetable as gt
+
+CSV_FIELDS = ["date", "schedule", "line", "train_id", "direction", "period_type"]
+
+
+def _tag(trains: List[int], order: int, period_type: str) -> Iterator[Tuple[int, int, str]]:
+    for t in sorted(trains):
+        yield t, order, period_type
+
+
+def iter_departures(slots: List[tuple]) -> Iterator[Tuple[int, str]]:
+    """Lazy collect_departures: the same sorted, de-duplicated (seconds, period_type) pairs.
+
+    Every slot's trains form one sorted stream and the streams are merged
+    with heapq.merge; on equal times the earlier slot comes first, so its
+    period_type wins as in collect_departures.
+    """
+    streams = [_tag(trains, i, slot[3]) for i, slot, trains, _ in gt.iter_slot_departures(slots)]
+    previous = None
+    for t, _, period_type in heapq.merge(*streams):
+        if t != previous:
+            previous = t
+            yield t, period_type
+
+
+def iter_trips(line: gt.Line, direction: str, slots: List[tuple], order: int = 0) -> Iterator[Tuple[int, int, dict]]:
+    """(departure, order, trip) for every train of one direction, in departure order.
+
+    trip holds the train ID, period type and the time shown at each station
+    in travel order (the values of the station-major JSON).
+    """
+    offsets_by_period = gt.compute_direction_offsets(direction, line)
+    route = [(station, line.station_index[station]) for station, _ in line.journey_tables[direction]]
+    for dep, period_type in iter_departures(slots):
+        offsets = offsets_by_period[period_type]
+        yield dep, order, {
+            "train_id": gt.train_id(direction, dep, period_type, line),
+            "direction": direction,
+            "period_type": period_type,
+            "times": {station: gt.format_seconds(dep + offsets[i]) for station, i in route},
+        }
+
+
+def iter_dates(start: date, days: int) -> Iterator[date]:
+    for n in range(days):
+        yield start + timedelta(days=n)
+
+
+def iter_service(network: List[Tuple[gt.Line, Dict[str, tuple]]], start: date, days: int,
+                 overrides: Dict[str, str] = None) -> Iterator[dict]:
+    """Every trip of every line over the horizon, day by day in departure order.
+
+    network pairs each line with its schedules as read_config_file returns
+    them. Dates whose schedule a line does not define are skipped for that line.
+    """
+    for service_date in iter_dates(start, days):
+        key = gt.schedule_for_date(service_date, overrides)
+        streams, line_names = [], []
+        for line, schedules in network:
+            if key not in schedules:
+                continue
+            _, first_slots, second_slots = schedules[key]
+            for direction, slots in zip(line.directions, (first_slots, second_slots)):
+                streams.append(iter_trips(line, direction, slots, len(streams)))
+                line_names.append(line.name)
+        stamp = {"date": service_date.isoformat(), "schedule": key}
+        for _, order, trip in heapq.merge(*streams):
+            yield {**stamp, "line": line_names[order], **trip}
+
+
+def write_jsonl(records: Iterator[dict], f: IO[str]) -> int:
+    """Write one JSON object per line; returns the number of records."""
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, separators=(',', ':'), ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(records: Iterator[dict], f: IO[str], lines: List[gt.Line]) -> int:
+    """Write one row per trip with a column per station (line order); returns the number of rows."""
+    stations = list(dict.fromkeys(station for line in lines for station in line.station_names))
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS + stations)
+    count = 0
+    for record in records:
+        times = record["times"]
+        writer.writerow([record[field] for field in CSV_FIELDS] + [times.get(station, "") for station in stations])
+        count += 1
+    return count
+
+
+def run_stream(output_path: str, start: date, days: int, config_path: str = "timetable-config.md",
+               lines: List[gt.Line] = (), overrides: Dict[str, str] = None) -> int:
+    """Stream the horizon to output_path (.csv → CSV, anything else → JSON Lines); returns trips written."""
+    network = [(line, gt.read_config_file(line_config, line)) for line, line_config in gt.network(config_path, lines)]
+    records = iter_service(network, start, days, overrides)
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        if output_path.endswith(".csv"):
+            return write_csv(records, f, [line for line, _ in network])
+        return write_jsonl(records, f)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Dhaka MRT-6 Verified Times Reconciliation
+Cross-references community verifications (docs/verified-times.json) with
+the timetables the config generates today.
+
+Verifications are keyed like "Uttara-North-Platform1-Motijheel-06:00": a
+station, a platform (1 → towards Motijheel, 2 → towards Uttara North) and
+the HH:MM the site showed. Each one is joined against a hashed index of
+(station, direction, minute) → trains over every generated schedule, so
+the whole set is reconciled in one linear pass.
+
+Verifications whose time no longer exists are looked up in the timetable
+files currently on disk (the previous generation). The train they belong
+to is found there by its origin departure, which is what train IDs are made
+of and which journey-time edits do not change, and the verification is
+remapped to that train's new time. Run before writing the new timetables,
+or point --baseline at a copy of the old ones.
+
+Run via:  python3 generate_timetable.py --verified [PATH] [--update-verified]
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import generate_timetable as gt
+
+VERIFIED_FILE = "docs/verified-times.json"
+
+_PLATFORM_RE = re.compile(r"(\d+)")
+_KEY_RE = re.compile(r"^(?P<station>.+?)-Platform-?(?P<platform>\d+)-.*?(?P<time>\d{1,2}:\d{2})$")
+
+IndexKey = Tuple[str, str, int]   # (station, direction, minute of day)
+
+
+class Train(NamedTuple):
+    schedule: str      # schedule key
+    train_id: str
+    period_type: str
+    seconds: int       # time shown at the station
+
+
+class Verification(NamedTuple):
+    time_id: str
+    station: str
+    direction: str
+    minute: int
+    status: str
+
+
+def _minute_label(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def parse_verification(time_id: str, entry: dict, line: gt.Line = None) -> Optional[Verification]:
+    """Station, direction and minute of one entry (from its fields, else its key); None if unreadable."""
+    line = line or gt.default_line()
+    key_match = _KEY_RE.match(time_id)
+    from_key = key_match.groupdict() if key_match else {}
+    station = entry.get("station") or from_key.get("station", "").replace("-", " ")
+    time_str = entry.get("time") or from_key.get("time")
+    if not station or not time_str or station not in line.station_index:
+        return None
+
+    direction = str(entry.get("direction", "")).replace("To ", "", 1).strip()
+    if direction not in line.journey_tables:
+        # Older entries name directions "Southbound"/"Northbound"; the platform decides
+        platform = _PLATFORM_RE.search(str(entry.get("platform") or from_key.get("platform", "")))
+        number = int(platform.group(1)) if platform else 0
+        if not 1 <= number <= len(line.directions):
+            return None
+        direction = line.directions[number - 1]
+    try:
+        minute = gt.parse_time_seconds(time_str) // 60
+    except ValueError:
+        return None
+    status = entry.get("status") or ("correct" if entry.get("isCorrect", True) else "incorrect")
+    return Verification(time_id, station, direction, minute, status)
+
+
+def build_index(schedules: Dict[str, dict], line: gt.Line = None) -> Dict[IndexKey, List[Train]]:
+    """(station, direction, minute) → trains shown in that minute, over every schedule plan.
+
+    schedules maps schedule keys to plans (see plan_schedule). Minutes are
+    the HH:MM the site shows (seconds are cut off, not rounded).
+    """
+    line = line or gt.default_line()
+    index: Dict[IndexKey, List[Train]] = {}
+    for key, plans in schedules.items():
+        for direction, (departures, offsets_by_period) in plans.items():
+            for dep, period in departures:
+                train = gt.train_id(direction, dep, period, line)
+                offsets = offsets_by_period[period]
+                for station, i in line.station_index.items():
+                    seconds = (dep + offsets[i]) % gt.SECONDS_PER_DAY
+                    index.setdefault((station, direction, seconds // 60), []).append(
+                        Train(key, train, period, seconds))
+    return index
+
+
+def build_origin_lookup(schedules: Dict[str, dict],
+                        line: gt.Line = None) -> Dict[Tuple[str, str, int], Tuple[str, List[int]]]:
+    """(schedule, direction, origin departure) → (train ID, shown seconds at every station in line order)."""
+    line = line or gt.default_line()
+    lookup = {}
+    for key, plans in schedules.items():
+        for direction, (departures, offsets_by_period) in plans.items():
+            for dep, period in departures:
+                lookup[(key, direction, dep)] = (gt.train_id(direction, dep, period, line),
+                                                 [(dep + offset) % gt.SECONDS_PER_DAY
+                                                  for offset in offsets_by_period[period]])
+    return lookup
+
+
+def baseline_origins(paths: Dict[str, str], line: gt.Line = None) -> Dict[IndexKey, List[Tuple[str, int]]]:
+    """(station, direction, minute) → (schedule, origin departure) pairs, from station-major timetable files.
+
+    paths maps schedule keys to their previous timetable file. The i-th time
+    of every station column of a direction belongs to the same train, so the
+    origin column gives each time's train.
+    """
+    line = line or gt.default_line()
+    origins: Dict[IndexKey, List[Tuple[str, int]]] = {}
+    for key, path in paths.items():
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            timetable = json.load(f)
+        for direction in line.directions:
+            origin = line.journey_tables[direction][0][0]
+            origin_times = [gt.parse_time_seconds(t) for t in timetable.get(origin, {}).get(direction, [])]
+            for station in line.station_names:
+                for i, t in enumerate(timetable.get(station, {}).get(direction, [])):
+                    if i < len(origin_times):
+                        origins.setdefault((station, direction, gt.parse_time_seconds(t) // 60), []).append(
+                            (key, origin_times[i]))
+    return origins
+
+
+def match_baseline(files: List[str], outputs: Dict[str, str]) -> Dict[str, str]:
+    """Schedule key → baseline file, matching file names to the schedules' output files."""
+    by_name = {os.path.basename(output_file): key for key, output_file in outputs.items()}
+    paths = {}
+    for path in files:
+        key = by_name.get(os.path.basename(path))
+        if key is None:
+            raise ValueError(f"baseline {path} is not named like any schedule's timetable "
+                             f"({', '.join(sorted(by_name))})")
+        paths[key] = path
+    return paths
+
+
+def reconcile(verified: Dict[str, dict], index: Dict[IndexKey, List[Train]],
+              origins: Dict[IndexKey, List[Tuple[str, int]]] = None,
+              lookup: Dict[Tuple[str, str, int], Tuple[str, List[int]]] = None, line: gt.Line = None) -> dict:
+    """Join verifications against the index in one pass.
+
+    Returns {"matched": [(verification, trains)], "remapped": [(verification, new minute, train ID)],
+    "missing": [verification], "unreadable": [time IDs]}.
+    """
+    line = line or gt.default_line()
+    result = {"matched": [], "remapped": [], "missing": [], "unreadable": []}
+    for time_id, entry in verified.items():
+        v = parse_verification(time_id, entry, line)
+        if v is None:
+            result["unreadable"].append(time_id)
+            continue
+        trains = index.get((v.station, v.direction, v.minute))
+        if trains:
+            result["matched"].append((v, trains))
+            continue
+        remap = None
+        for key, dep in (origins or {}).get((v.station, v.direction, v.minute), ()):
+            found = (lookup or {}).get((key, v.direction, dep))
+            if found:
+                train, shown = found
+                remap = (v, shown[line.station_index[v.station]] // 60, train)
+                break
+        if remap:
+            result["remapped"].append(remap)
+        else:
+            result["missing"].append(v)
+    return result
+
+
+def coverage(index: Dict[IndexKey, List[Train]], matched: List[Tuple[Verification, List[Train]]]):
+    """Verified / total timetable minutes, per station and per period type."""
+    verified_keys = {(v.station, v.direction, v.minute) for v, _ in matched}
+    by_station: Dict[str, List[int]] = {}
+    by_period: Dict[str, List[int]] = {}
+    for key, trains in index.items():
+        hit = key in verified_keys
+        counts = by_station.setdefault(key[0], [0, 0])
+        counts[0] += hit
+        counts[1] += 1
+        for period in {train.period_type for train in trains}:
+            counts = by_period.setdefault(period, [0, 0])
+            counts[0] += hit
+            counts[1] += 1
+    return by_station, by_period
+
+
+def update_verified(data: dict, remapped: List[Tuple[Verification, int, str]]) -> List[Tuple[Verification, str]]:
+    """Move remapped entries to their new time (key, timeId and time).
+
+    An entry whose new key is already taken, by a verification there or by
+    another entry moved to the same time, is left where it is. Returns
+    (verification, taken key) for those.
+    """
+    entries = data["verified_times"]
+    kept = []
+    for v, minute, _ in remapped:
+        label = _minute_label(minute)
+        new_id = re.sub(r"\d{1,2}:\d{2}$", label, v.time_id)
+        if new_id in entries:
+            kept.append((v, new_id))
+            continue
+        entry = entries.pop(v.time_id)
+        entry["time"] = label
+        if "timeId" in entry:
+            entry["timeId"] = new_id
+        entries[new_id] = entry
+    return kept
+
+
+def _coverage_line(name: str, counts: List[int]) -> str:
+    hit, total = counts
+    return f"  {name:<24} {hit:>4} / {total:<5} {100 * hit / total if total else 0:5.1f}%"
+
+
+def run_reconcile(verified_path: str = VERIFIED_FILE, config_path: str = "timetable-config.md",
+                  baseline: List[str] = None, update: bool = False) -> bool:
+    """Reconcile a verified-times file with the config and print a report; True if nothing is missing."""
+    line = gt.default_line()
+    configured = gt.read_config_file(config_path, line)
+    schedules = {key: gt.plan_schedule(first_slots, second_slots, gt.quiet, line)
+                 for key, (_, first_slots, second_slots) in configured.items()}
+    with open(verified_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    verified = data.get("verified_times", {})
+
+    outputs = {key: output_file for key, ((output_file, _), _, _) in configured.items()}
+    paths = outputs if baseline is None else match_baseline(baseline, outputs)
+    index = build_index(schedules, line)
+    result = reconcile(verified, index, baseline_origins(paths, line), build_origin_lookup(schedules, line), line)
+
+    print(f"Verified times: {len(verified)} entr{'y' if len(verified) == 1 else 'ies'} in {verified_path}")
+    print(f"✓ {len(result['matched'])} match the generated timetables")
+    disputed = [v for v, _ in result["matched"] if v.status != "correct"]
+    if disputed:
+        print(f"⚠ {len(disputed)} reported as {'/'.join(sorted({v.status for v in disputed}))} "
+              f"but still in the timetables:")
+        for v in disputed:
+            print(f"  {v.station} → {v.direction} {_minute_label(v.minute)} ({v.time_id})")
+    if result["remapped"]:
+        print(f"↷ {len(result['remapped'])} moved with their train:")
+        for v, minute, train in result["remapped"]:
+            print(f"  {v.station} → {v.direction} {_minute_label(v.minute)} → {_minute_label(minute)} ({train})")
+    if result["missing"]:
+        print(f"❌ {len(result['missing'])} no longer in any timetable:")
+        for v in result["missing"]:
+            print(f"  {v.station} → {v.direction} {_minute_label(v.minute)} ({v.time_id})")
+    if result["unreadable"]:
+        print(f"⚠ {len(result['unreadable'])} entr{'y' if len(result['unreadable']) == 1 else 'ies'} "
+              f"without a known station, direction or time: {', '.join(result['unreadable'])}")
+
+    by_station, by_period = coverage(index, result["matched"])
+    print("\nCoverage by station (verified / timetable minutes):")
+    for station in line.station_names:
+        if station in by_station:
+            print(_coverage_line(station, by_station[station]))
+    print("Coverage by period:")
+    for period in gt.PERIOD_TYPES:
+        if period in by_period:
+            print(_coverage_line(period, by_period[period]))
+
+    if update and result["remapped"]:
+        kept = update_verified(data, result["remapped"])
+        with open(verified_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"\n✓ {len(result['remapped']) - len(kept)} verification(s) moved to their new times in {verified_path}")
+        if kept:
+            print(f"⚠ {len(kept)} left at their old time, as their new key is already taken:")
+            for v, new_id in kept:
+                print(f"  {v.time_id} → {new_id}")
+    return not result["missing"]